@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import TokenUser
+
+User = get_user_model()
+
+USER_STATE_KEY = 'auth:user:{}'
+# Поля пользователя, которые попадают в токен. Для проверки прав
+# нужны только id, role и is_superuser; username выводится
+# как автор в ответах на создание отзывов и комментариев.
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+# Состояние удаленного или заблокированного пользователя.
+REVOKED = 'revoked'
+
+
+def user_state(user):
+    '''
+    Отпечаток полей, от которых зависит действительность токена.
+    '''
+    if user is None or not user.is_active:
+        return REVOKED
+    return [user.role, user.is_superuser]
+
+
+def cache_user_state(user_id, state):
+    cache.set(USER_STATE_KEY.format(user_id), state,
+              settings.AUTH_STATE_CACHE_TIMEOUT)
+
+
+def get_user_state(user_id):
+    '''
+    Состояние пользователя из кэша; при промахе - один запрос к БД.
+    Сигналы обновляют кэш при каждом изменении пользователя
+    (см. api/signals.py).
+    '''
+    state = cache.get(USER_STATE_KEY.format(user_id))
+    if state is None:
+        state = user_state(User.objects.filter(pk=user_id).only(
+            'role', 'is_superuser', 'is_active'
+        ).first())
+        cache_user_state(user_id, state)
+    return state
+
+
+def access_token_for(user):
+    token = RefreshToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token.access_token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    '''
+    Пользователь собирается из полей токена без запроса к БД.
+
+    Токен отзывается, если пользователь удален или заблокирован,
+    или если у него поменялись роль или is_superuser: сверка идет
+    с состоянием из кэша. Пока кэш локален для процесса (LocMem),
+    другие процессы увидят изменения не позже чем через
+    AUTH_STATE_CACHE_TIMEOUT секунд.
+
+    Токены, выданные без этих полей, проверяются по БД, как раньше.
+    '''
+
+    def get_user(self, validated_token):
+        if any(field not in validated_token for field in CLAIM_FIELDS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = get_user_state(user_id)
+        if state == REVOKED:
+            raise AuthenticationFailed(
+                'Пользователь удален или заблокирован', code='user_inactive'
+            )
+        if state != [validated_token['role'],
+                     validated_token['is_superuser']]:
+            raise AuthenticationFailed(
+                'Права пользователя изменились, получите новый токен',
+                code='token_revoked'
+            )
+        return TokenUser(id=user_id, **{
+            field: validated_token[field] for field in CLAIM_FIELDS
+        })
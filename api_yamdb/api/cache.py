@@ -0,0 +1,137 @@
+import hashlib
+import time
+from functools import partial
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .metrics import count_cache
+from .replicas import read_from_primary_if_modified
+
+GENERATION_KEY = 'catalog:generation:{}'
+RESPONSE_KEY = 'catalog:response:{}'
+MODIFIED_KEY = 'catalog:modified:{}'
+# Общее пространство вложенных списков (review:{title_id},
+# comment:{review_id}): после массовой записи перечислять их
+# по одному не нужно, достаточно увеличить это поколение.
+BULK_GENERATION = 'bulk'
+
+
+def new_generation():
+    '''
+    Начальное значение счетчика берется из времени, чтобы после
+    вытеснения ключа из кэша поколение не вернулось к старому
+    значению и не "оживило" устаревшие ответы.
+    '''
+    return int(time.time() * 1000000)
+
+
+def get_or_add_many(key_template, names, default):
+    '''
+    Значения ключей для списка пространств; отсутствующие
+    инициализируются значением default() через add (без гонок).
+    '''
+    keys = [key_template.format(name) for name in names]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, default(), None)
+            values[key] = cache.get(key)
+    return tuple(values[key] for key in keys)
+
+
+def get_generations(names):
+    '''
+    Текущие поколения для списка пространств (title, genre, ...).
+    '''
+    return get_or_add_many(GENERATION_KEY, names, new_generation)
+
+
+def get_last_modified(names):
+    '''
+    Время последнего изменения в пространствах (unix time).
+    Если отметка вытеснена из кэша, берется текущее время -
+    оно не раньше любого реального изменения.
+    '''
+    return max(get_or_add_many(MODIFIED_KEY, names, time.time))
+
+
+def bump_generation(name):
+    '''
+    Инвалидирует все ответы, зависящие от пространства name.
+    incr атомарен и в LocMem, и в общих бэкендах (memcached, redis).
+    '''
+    key = GENERATION_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, new_generation(), None)
+        cache.incr(key)
+    cache.set(MODIFIED_KEY.format(name), time.time(), None)
+
+
+def bump_generation_on_commit(name):
+    '''
+    bump_generation после фиксации текущей транзакции. Если
+    увеличить поколение раньше, параллельный запрос прочитает
+    еще старые строки и сохранит их под ключом нового поколения.
+    Вне транзакции поколение увеличивается сразу.
+    '''
+    transaction.on_commit(partial(bump_generation, name))
+
+
+class CachedListMixin:
+    '''
+    Кэширует данные ответов list (и retrieve в CachedListRetrieveMixin).
+
+    Ключ строится из адреса, нормализованной строки запроса
+    (фильтры и пагинация) и текущих поколений пространств из
+    cache_generations. Запись в любую из связанных моделей
+    увеличивает поколение (см. api/signals.py), и старые ключи
+    больше не используются - отдельно удалять их не нужно.
+    '''
+    cache_generations = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count_cache('hit')
+            return Response(data)
+        count_cache('miss')
+        read_from_primary_if_modified(
+            get_last_modified(self.cache_generations)
+        )
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted(
+            (param, sorted(values))
+            for param, values in request.query_params.lists()
+        ), doseq=True)
+        raw_key = '{}|{}|{}|{}'.format(
+            request.build_absolute_uri(request.path),
+            self.action,
+            query,
+            get_generations(self.cache_generations),
+        )
+        return RESPONSE_KEY.format(
+            hashlib.md5(raw_key.encode()).hexdigest()
+        )
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def replicas_need_shared_cache(app_configs, **kwargs):
+    '''
+    Закрепление клиента за default после записи (см. ReplicaMiddleware)
+    хранится в кэше по id пользователя: с LocMem его видит только
+    процесс, обработавший запись, и следующее чтение другого
+    процесса уйдет на отстающую реплику.
+    '''
+    if not (settings.DATABASE_REPLICAS
+            and isinstance(caches['default'], LocMemCache)):
+        return []
+    return [Error(
+        'Чтение с реплик (DB_REPLICAS) требует общего кэша.',
+        hint='Укажите CACHE_BACKEND и CACHE_LOCATION, например memcached.',
+        id='api.E001',
+    )]
@@ -0,0 +1,79 @@
+import hashlib
+import math
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_generations, get_last_modified
+from .metrics import count_cache
+from .replicas import read_from_primary_if_modified
+
+
+class ConditionalGetMixin:
+    '''
+    Условные GET-запросы для list и retrieve.
+
+    ETag и Last-Modified вычисляются по версиям из кэша
+    (см. api/cache.py), которые сигналы увеличивают при каждой
+    записи. Совпадение If-None-Match / If-Modified-Since дает
+    ответ 304 до обращения к БД и сериализаторам.
+    '''
+
+    def get_version_scopes(self):
+        '''
+        Пространства версий, от которых зависит ответ.
+        По умолчанию - поколение модели представления
+        (см. invalidate_catalog_cache в api/signals.py).
+        '''
+        return (self.get_queryset().model._meta.model_name,)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        scopes = self.get_version_scopes()
+        etag = self.get_etag(request, scopes)
+        modified = get_last_modified(scopes)
+        last_modified = math.ceil(modified)
+        if self.is_not_modified(request, etag, last_modified):
+            count_cache('not_modified')
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            read_from_primary_if_modified(modified)
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_etag(self, request, scopes):
+        raw_etag = '{}|{}|{}'.format(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            get_generations(scopes),
+        )
+        return '"{}"'.format(hashlib.md5(raw_etag.encode()).hexdigest())
+
+    def is_not_modified(self, request, etag, last_modified):
+        '''
+        If-None-Match имеет приоритет над If-Modified-Since (RFC 7232).
+        '''
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            return etag in parse_etags(if_none_match)
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE')
+        )
+        return (if_modified_since is not None
+                and last_modified <= if_modified_since)
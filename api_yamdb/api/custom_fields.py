@@ -1,3 +1,5 @@
+from django.utils.encoding import smart_str
+from rest_framework import serializers
 from rest_framework.fields import CurrentUserDefault
 
 
@@ -7,3 +9,48 @@ class CurrentTitleDefault(CurrentUserDefault):
     '''
     def __call__(self, serializer_field):
         return serializer_field.context['view'].kwargs['title_id']
+
+
+def prefetched_objects(field):
+    '''
+    Объекты модели поля, заранее загруженные для всей пачки:
+    context['related_objects'][Model] = {ключ: объект}.
+    '''
+    return field.context.get('related_objects', {}).get(
+        field.get_queryset().model
+    )
+
+
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    '''
+    При пакетной валидации ищет объекты в context['related_objects']
+    вместо запроса к БД на каждое значение.
+    '''
+
+    def to_internal_value(self, data):
+        objects = prefetched_objects(self)
+        if objects is None:
+            return super().to_internal_value(data)
+        if str(data) not in objects:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return objects[str(data)]
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    '''
+    Как PrefetchedSlugRelatedField, но по первичному ключу.
+    '''
+
+    def to_internal_value(self, data):
+        objects = prefetched_objects(self)
+        if objects is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
@@ -1,17 +1,105 @@
 import django_filters
+from django import forms
+from django.db.models import F
+from django_filters.constants import EMPTY_VALUES
 from reviews.models import Category, Genre, Title
 
 
+class TitleOrderingFilter(django_filters.OrderingFilter):
+    '''
+    Сортировка по сохраненным полям произведения, для которых есть
+    индексы (см. Title.Meta.indexes). Последним ключом добавляется
+    id в направлении первого ключа, чтобы порядок был однозначным
+    и совпадал с индексом. Произведения без оценок при сортировке
+    по рейтингу идут в конце в обоих направлениях.
+    '''
+    nulls_last = ('score_avg',)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        tiebreaker = '-pk' if value[0].startswith('-') else 'pk'
+        return qs.order_by(*ordering, tiebreaker)
+
+    def get_ordering_value(self, param):
+        descending = param.startswith('-')
+        field_name = self.param_map[param.lstrip('-')]
+        if field_name not in self.nulls_last:
+            return '-' + field_name if descending else field_name
+        field = F(field_name)
+        if descending:
+            return field.desc(nulls_last=True)
+        return field.asc(nulls_last=True)
+
+
+class GenreSlugsWidget(forms.TextInput):
+    '''
+    Слаги жанров из повторяющегося параметра и/или через запятую:
+    ?genre_all=drama&genre_all=comedy или ?genre_all=drama,comedy.
+    '''
+
+    def value_from_datadict(self, data, files, name):
+        if hasattr(data, 'getlist'):
+            values = data.getlist(name)
+        else:
+            values = [data[name]] if name in data else []
+        return [
+            slug.strip()
+            for value in values for slug in str(value).split(',')
+            if slug.strip()
+        ]
+
+
+class GenreSlugsField(forms.Field):
+    '''
+    Переводит слаги жанров в отсортированные id одним запросом.
+    '''
+    widget = GenreSlugsWidget
+    default_error_messages = {
+        'invalid_choice': 'Выберите корректный вариант. %(value)s '
+                          'нет среди допустимых значений.',
+    }
+
+    def clean(self, value):
+        if not value:
+            return super().clean(None)
+        ids = dict(
+            Genre.objects.filter(slug__in=value).values_list('slug', 'pk')
+        )
+        for slug in value:
+            if slug not in ids:
+                raise forms.ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': slug},
+                )
+        return sorted(set(ids.values()))
+
+
+class GenreSetFilter(django_filters.Filter):
+    '''
+    Фильтр по сохраненному массиву Title.genre_ids с GIN-индексом:
+    одно условие по таблице произведений без JOIN с таблицей
+    связей и без DISTINCT. lookup_expr 'overlap' - хотя бы один
+    из жанров, 'contains' - все жанры.
+    '''
+    field_class = GenreSlugsField
+
+    def __init__(self, lookup_expr, **kwargs):
+        super().__init__(
+            field_name='genre_ids', lookup_expr=lookup_expr, **kwargs
+        )
+
+
 class CustomFilter(django_filters.FilterSet):
     """
     Класс для фильтрации свзяанных полей
     модели Title по slug вместно pk (id).
     """
-    genre = django_filters.ModelMultipleChoiceFilter(
-        field_name='genre__slug',
-        to_field_name='slug',
-        queryset=Genre.objects.all()
-    )
+    genre = GenreSetFilter('overlap')
+    genre_any = GenreSetFilter('overlap')
+    genre_all = GenreSetFilter('contains')
     category = django_filters.ModelMultipleChoiceFilter(
         field_name='category__slug',
         to_field_name='slug',
@@ -24,7 +112,21 @@ class CustomFilter(django_filters.FilterSet):
     year = django_filters.NumberFilter(
         field_name='year'
     )
+    search = django_filters.CharFilter(
+        method='filter_search'
+    )
+    ordering = TitleOrderingFilter(
+        fields=(('score_avg', 'rating'), ('year', 'year'), ('name', 'name'))
+    )
 
     class Meta:
         model = Title
-        fields = ('genre', 'category', 'name', 'year',)
+        fields = ('genre', 'genre_any', 'genre_all', 'category', 'name',
+                  'year', 'search', 'ordering',)
+
+    def filter_search(self, queryset, name, value):
+        '''
+        Полнотекстовый поиск по названию и описанию,
+        результаты отсортированы по релевантности.
+        '''
+        return queryset.search(value)
@@ -0,0 +1,150 @@
+import csv
+import io
+from datetime import datetime, time
+from itertools import islice
+
+import orjson
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.text import compress_sequence
+from reviews.models import Comment, Review, Title
+
+from .renderers import encode_default
+from .rows import RowPlan
+from .serializers import (CommentSerializer, ReviewExportSerializer,
+                          TitleReadSerializer)
+
+CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+# Выгрузка: (сериализатор, выборка, поле даты для since или None).
+EXPORTS = {
+    'titles': (TitleReadSerializer, Title.objects.all, None),
+    'reviews': (ReviewExportSerializer, Review.objects.all, 'pub_date'),
+    'comments': (CommentSerializer, Comment.objects.all, 'pub_date'),
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_since(value):
+    '''
+    Дата или дата и время в ISO 8601; время без зоны
+    считается в зоне проекта. Несуществующая дата
+    (2021-02-30) - такая же ошибка формата.
+    '''
+    try:
+        since = parse_datetime(value)
+        date = None if since else parse_date(value)
+    except ValueError:
+        since = date = None
+    if since is None:
+        if date is None:
+            raise ExportError(
+                'Неверный формат since: {}. Ожидается ISO 8601, '
+                'например 2021-09-01 или 2021-09-01T12:00:00Z.'.format(value)
+            )
+        since = datetime.combine(date, time.min)
+    if timezone.is_naive(since):
+        return timezone.make_aware(since)
+    return since
+
+
+def export_queryset(name, since=None):
+    '''
+    План и выборка строк выгрузки name в порядке id. since оставляет
+    объекты, опубликованные не раньше этой даты; у произведений
+    даты нет.
+    '''
+    if name not in EXPORTS:
+        raise ExportError('Неизвестная выгрузка: {}.'.format(name))
+    serializer_class, queryset, date_field = EXPORTS[name]
+    queryset = queryset()
+    if since is not None:
+        if date_field is None:
+            raise ExportError(
+                'У выгрузки {} нет даты для since.'.format(name)
+            )
+        queryset = queryset.filter(**{date_field + '__gte': since})
+    plan = RowPlan(serializer_class())
+    return plan, plan.values(queryset).order_by('pk')
+
+
+def export_chunks(plan, queryset, chunk_size=CHUNK_SIZE):
+    '''
+    Объекты выгрузки пачками по chunk_size. Строки читаются
+    курсором на стороне сервера (iterator), связи многие-ко-многим -
+    одним запросом на пачку, поэтому память не зависит
+    от размера таблицы.
+    '''
+    with transaction.atomic(using=queryset.db):
+        # В транзакции курсор Postgres не WITH HOLD и не
+        # материализует всю выборку при фиксации.
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield plan.represent(chunk)
+
+
+def encode_ndjson(chunks):
+    for items in chunks:
+        yield b''.join(
+            orjson.dumps(item, default=encode_default) + b'\n'
+            for item in items
+        )
+
+
+def csv_value(value):
+    '''
+    Вложенные объекты и списки (категория, жанры) записываются
+    в ячейку как JSON, None - пустой строкой.
+    '''
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value, default=encode_default).decode()
+    return value
+
+
+def encode_csv(chunks, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for items in chunks:
+        writer.writerows(
+            [csv_value(item[field]) for field in fields] for item in items
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_stream(name, export_format, since=None, compress=False,
+                  chunk_size=CHUNK_SIZE):
+    '''
+    Байты выгрузки name в формате ndjson или csv, по желанию в gzip.
+    Ошибки параметров (ExportError) возникают сразу, до начала
+    потока.
+    '''
+    if export_format not in CONTENT_TYPES:
+        raise ExportError('Неизвестный формат: {}.'.format(export_format))
+    plan, queryset = export_queryset(name, since)
+    chunks = export_chunks(plan, queryset, chunk_size)
+    if export_format == 'csv':
+        stream = encode_csv(
+            chunks, [field_name for field_name, _ in plan.getters]
+        )
+    else:
+        stream = encode_ndjson(chunks)
+    if compress:
+        return compress_sequence(stream)
+    return stream
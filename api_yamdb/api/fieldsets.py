@@ -0,0 +1,118 @@
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions, serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def is_top_level(serializer):
+    '''
+    Сериализатор ответа, а не вложенное поле: корень
+    или элемент корневого списка (many=True).
+    '''
+    parent = serializer.parent
+    return parent is None or (
+        parent.parent is None
+        and isinstance(parent, serializers.ListSerializer)
+    )
+
+
+def split_fields(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    '''
+    Оставляет в ответе только поля из context['fieldset']
+    (см. SparseFieldsetMixin); вложенные сериализаторы не обрезаются.
+
+    field_sources - поля модели, которые нужны полям сериализатора,
+    не являющимся полями модели (например, свойствам).
+    '''
+    field_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None or not is_top_level(self):
+            return fields
+        return OrderedDict(
+            (name, field) for name, field in fields.items()
+            if name in fieldset
+        )
+
+
+def fieldset_queryset(queryset, serializer):
+    '''
+    Загружает из БД только то, что нужно оставшимся полям:
+    only() по полям модели, JOIN (select_related) - для связей,
+    которые выводятся не только первичным ключом, prefetch -
+    для многие-ко-многим. Связи выброшенных полей не загружаются.
+    '''
+    model = queryset.model
+    only, select, prefetch = {model._meta.pk.name}, set(), set()
+    for name, field in serializer.fields.items():
+        source = field.source.split('.')[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            only.update(serializer.field_sources.get(name, ()))
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.add(source)
+            continue
+        only.add(source)
+        if (not model_field.is_relation
+                or isinstance(field, serializers.PrimaryKeyRelatedField)):
+            continue
+        select.add(source)
+        if isinstance(field, serializers.SlugRelatedField):
+            only.add('{}__{}'.format(source, field.slug_field))
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*only)
+
+
+class SparseFieldsetMixin:
+    '''
+    Параметры ?fields=id,name (только эти поля) и ?omit=description
+    (все, кроме этих) для GET-запросов. Набор полей сокращает и ответ,
+    и запрос к БД (см. fieldset_queryset).
+    '''
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.fieldset = self.get_fieldset(request)
+
+    def get_fieldset(self, request):
+        params = request.query_params
+        if (request.method not in permissions.SAFE_METHODS
+                or not (FIELDS_PARAM in params or OMIT_PARAM in params)):
+            return None
+        available = list(self.get_serializer_class()().fields)
+        fields = split_fields(params.get(FIELDS_PARAM, '')) or available
+        omit = split_fields(params.get(OMIT_PARAM, ''))
+        unknown = sorted(set(fields + omit) - set(available))
+        if unknown:
+            raise serializers.ValidationError({
+                FIELDS_PARAM: 'Неизвестные поля: {}. Доступны: {}.'.format(
+                    ', '.join(unknown), ', '.join(available)
+                )
+            })
+        return {name for name in fields if name not in omit}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = getattr(self, 'fieldset', None)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'fieldset', None) is None:
+            return queryset
+        return fieldset_queryset(queryset, self.get_serializer())
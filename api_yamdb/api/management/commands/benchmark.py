@@ -0,0 +1,493 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from reviews.models import (Category, Comment, Genre, Review, Title, User,
+                            UserRoles)
+
+from ...renderers import MessagePackRenderer, OrjsonRenderer
+from ...rows import RowPlan
+from ...serializers import (CommentSerializer, ListRetrieveReviewSerializer,
+                            TitleReadSerializer)
+from ...throttling import SlidingWindowMixin
+
+PERCENTILES = (50, 95, 99)
+# Объектов в одном запросе к пакетным маршрутам.
+BATCH_SIZE = 10
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes')
+# Read serializers measured per row: ModelSerializer over model
+# instances against RowPlan over values_list() rows.
+SERIALIZERS = (
+    ('titles', TitleReadSerializer,
+     lambda: Title.objects.with_relations().order_by('pk')),
+    ('reviews', ListRetrieveReviewSerializer,
+     lambda: Review.objects.with_author()),
+    ('comments', CommentSerializer, lambda: Comment.objects.with_author()),
+)
+RENDERERS = (
+    ('json', JSONRenderer()),
+    ('orjson', OrjsonRenderer()),
+    ('msgpack', MessagePackRenderer()),
+)
+
+
+def percentile(values, percent):
+    '''
+    Nearest-rank percentile of a non-empty list.
+    '''
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def find_regressions(baseline, current, threshold):
+    '''
+    Metrics of scenarios present in both runs that grew
+    by more than threshold percent.
+    '''
+    regressions = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            continue
+        for metric in METRICS:
+            limit = old[metric] * (1 + threshold / 100)
+            if new[metric] > limit:
+                regressions.append((name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def cpu_time(function, options):
+    '''
+    Median CPU time of a call, seconds, and the last result.
+    '''
+    timings = []
+    for iteration in range(options['warmup'] + options['iterations']):
+        started = time.process_time()
+        result = function()
+        elapsed = time.process_time() - started
+        if iteration >= options['warmup']:
+            timings.append(elapsed)
+    return percentile(timings, 50), result
+
+
+@contextmanager
+def throttling_disabled():
+    '''
+    Throttle rates are per hour: a benchmark would hit them at once.
+    Views with their own throttle_classes (auth) are covered by
+    letting every sliding window throttle through.
+    '''
+    throttle_classes = APIView.throttle_classes
+    allow_request = SlidingWindowMixin.allow_request
+    APIView.throttle_classes = ()
+    SlidingWindowMixin.allow_request = lambda self, request, view: True
+    try:
+        yield
+    finally:
+        APIView.throttle_classes = throttle_classes
+        SlidingWindowMixin.allow_request = allow_request
+
+
+class Command(BaseCommand):
+    help = ('Measure latency, SQL queries and response size of every '
+            'API route on a seeded dataset; compare runs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Save results as a JSON baseline to this file'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Compare this run with a saved JSON baseline'
+        )
+        parser.add_argument(
+            '--compare',
+            nargs=2,
+            metavar=('BASELINE', 'CURRENT'),
+            help='Only compare two saved runs, without benchmarking'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10,
+            help='Allowed growth of a metric, percent'
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--warm_cache',
+            action='store_true',
+            help='Keep the response cache between requests '
+                 '(by default it is cleared to measure the full path)'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Rows per run of the per-row serializer benchmark'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the benchmark database (and its data) between runs'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            baseline, current = (
+                self.load(path) for path in options['compare']
+            )
+            self.report_regressions(baseline, current, options['threshold'])
+            return
+        results = self.run_benchmarks(options)
+        self.print_results(results)
+        self.check_statuses(results)
+        if options['output']:
+            with open(options['output'], 'w') as file_object:
+                json.dump(results, file_object, indent=2, sort_keys=True)
+        if options['baseline']:
+            self.report_regressions(
+                self.load(options['baseline']), results,
+                options['threshold']
+            )
+
+    def check_statuses(self, results):
+        '''
+        A scenario answered with an error measures the error path,
+        not the route, so such a run is neither a result nor a baseline.
+        '''
+        failed = [
+            name for name, result in results['results'].items()
+            if not 200 <= result['status'] < 300
+        ]
+        if failed:
+            raise CommandError(
+                'Non-2xx responses measured: {}'.format(', '.join(failed))
+            )
+
+    def load(self, path):
+        with open(path) as file_object:
+            return json.load(file_object)
+
+    def run_benchmarks(self, options):
+        '''
+        Benchmarks run on a separate test database filled by
+        generatedata, so real data is never touched. Only default
+        is switched to the test database, so replicas are disabled
+        for the run: reads routed to them would hit real data.
+        '''
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            if not Title.objects.exists():
+                call_command(
+                    'generatedata', seed=options['seed'],
+                    users=options['users'], titles=options['titles'],
+                    reviews=options['reviews'], comments=options['comments'],
+                    stdout=self.stdout,
+                )
+            with throttling_disabled(), override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                DATABASE_REPLICAS=[],
+            ):
+                results = {
+                    name: self.measure(request, options)
+                    for name, request in self.scenarios(options)
+                }
+            serializers, renderers = {}, {}
+            for name, serializer, queryset in SERIALIZERS:
+                serializers[name], data = self.measure_serializer(
+                    serializer, queryset(), options
+                )
+                renderers[name] = self.measure_renderers(data, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+        return {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+                'dataset': {
+                    key: options[key] for key in
+                    ('seed', 'users', 'titles', 'reviews', 'comments')
+                },
+            },
+            'results': results,
+            'serializers': serializers,
+            'renderers': renderers,
+        }
+
+    def measure(self, request, options):
+        timings, statuses = [], set()
+        for iteration in range(options['warmup'] + options['iterations']):
+            if not options['warm_cache']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = request()
+                # Потоковый ответ (выгрузка) читается внутри замера.
+                content = response.getvalue()
+                elapsed = time.perf_counter() - started
+            statuses.add(response.status_code)
+            if iteration >= options['warmup']:
+                timings.append(elapsed * 1000)
+        result = {
+            'p{}_ms'.format(percent): round(percentile(timings, percent), 3)
+            for percent in PERCENTILES
+        }
+        result.update({
+            # Худший статус: ошибка хотя бы в одной итерации видна.
+            'status': max(statuses),
+            'queries': len(queries),
+            'bytes': len(content),
+        })
+        return result
+
+    def measure_serializer(self, serializer_class, queryset, options):
+        '''
+        CPU time per row of fetching and serializing options['rows']
+        rows: model instances and ModelSerializer against values_list()
+        rows and RowPlan. Both must render the same JSON.
+        '''
+        queryset = queryset[:options['rows']]
+        plan = RowPlan(serializer_class())
+
+        def model_serializer():
+            return serializer_class(list(queryset), many=True).data
+
+        def row_plan():
+            return plan.represent(list(plan.values(queryset)))
+
+        result, outputs = {}, {}
+        for name, serialize in (('drf', model_serializer),
+                                ('values', row_plan)):
+            seconds, outputs[name] = cpu_time(serialize, options)
+            result['{}_us_per_row'.format(name)] = round(
+                seconds * 10 ** 6 / max(len(outputs[name]), 1), 2
+            )
+        render = JSONRenderer().render
+        result['identical'] = (
+            render(outputs['drf']) == render(outputs['values'])
+        )
+        result['rows'] = len(outputs['values'])
+        return result, outputs['values']
+
+    def measure_renderers(self, data, options):
+        '''
+        CPU time and payload size of encoding the same rows
+        with every response renderer.
+        '''
+        result = {}
+        for name, renderer in RENDERERS:
+            seconds, content = cpu_time(
+                partial(renderer.render, data), options
+            )
+            seconds = max(seconds, 1e-9)
+            result[name] = {
+                'encode_ms': round(seconds * 1000, 3),
+                'mb_per_s': round(len(content) / seconds / 10 ** 6, 1),
+                'bytes': len(content),
+            }
+        return result
+
+    def scenarios(self, options):
+        '''
+        (name, request) pairs covering every route in api/urls.py.
+        Writes go last, so reads measure the generated dataset.
+        '''
+        anon = APIClient()
+        admin, _ = User.objects.get_or_create(
+            username='benchmark_admin', email='benchmark_admin@yamdb.fake',
+            role=UserRoles.ADMIN
+        )
+        admin_client = APIClient()
+        admin_client.force_authenticate(admin)
+        user = User.objects.exclude(pk=admin.pk).first()
+        user_client = APIClient()
+        user_client.force_authenticate(user)
+
+        title = Title.objects.annotate(
+            reviews_total=Count('reviews')
+        ).order_by('-reviews_total').first()
+        review = Review.objects.annotate(
+            comments_total=Count('comments')
+        ).order_by('-comments_total').first()
+        comment = review.comments.first()
+        genre = Genre.objects.annotate(
+            titles_total=Count('title')
+        ).order_by('-titles_total').first()
+        category = Category.objects.first()
+        word = title.name.split()[0]
+        reviews_url = '/api/v1/titles/{}/reviews/'.format(review.title_id)
+        comments_url = '{}{}/comments/'.format(reviews_url, review.pk)
+        # Имена уникальны и между запусками с --keepdb.
+        signups = iter(range(time.time_ns(), 10 ** 20))
+
+        def signup():
+            number = next(signups)
+            return anon.post('/api/v1/auth/signup/', {
+                'username': 'benchmark{}'.format(number),
+                'email': 'benchmark{}@yamdb.fake'.format(number),
+            }, format='json')
+
+        def token():
+            return anon.post('/api/v1/auth/token/', {
+                'username': user.username,
+                'confirmation_code':
+                    PasswordResetTokenGenerator().make_token(user),
+            }, format='json')
+
+        # Отзыв уникален для автора и произведения: каждая пачка
+        # отзывов отправляется новым пользователем.
+        batch_authors = iter(User.objects.bulk_create(
+            User(username='benchmark_batch{}'.format(number),
+                 email='benchmark_batch{}@yamdb.fake'.format(number))
+            for number in map(next, [signups] * (
+                options['warmup'] + options['iterations']
+            ))
+        ))
+        batch_titles = list(Title.objects.order_by('pk')[:BATCH_SIZE])
+        batch_client = APIClient()
+
+        def titles_batch():
+            return admin_client.post('/api/v1/titles/batch/', [{
+                'name': 'Benchmark {}'.format(number), 'year': title.year,
+                'description': 'Benchmark',
+                'category': category.slug, 'genre': [genre.slug],
+            } for number in range(BATCH_SIZE)], format='json')
+
+        def reviews_batch():
+            batch_client.force_authenticate(next(batch_authors))
+            return batch_client.post('/api/v1/reviews/batch/', [{
+                'title': batch_title.pk, 'text': 'Benchmark', 'score': 5,
+            } for batch_title in batch_titles], format='json')
+
+        def get(client, url, params=None):
+            return lambda: client.get(url, params)
+
+        return (
+            ('titles_list', get(anon, '/api/v1/titles/')),
+            ('titles_list_genre',
+             get(anon, '/api/v1/titles/', {'genre': genre.slug})),
+            ('titles_list_category',
+             get(anon, '/api/v1/titles/', {'category': category.slug})),
+            ('titles_list_name', get(anon, '/api/v1/titles/', {'name': word})),
+            ('titles_list_year',
+             get(anon, '/api/v1/titles/', {'year': title.year})),
+            ('titles_list_search',
+             get(anon, '/api/v1/titles/', {'search': word})),
+            ('titles_detail',
+             get(anon, '/api/v1/titles/{}/'.format(title.pk))),
+            ('titles_stats',
+             get(anon, '/api/v1/titles/{}/stats/'.format(title.pk))),
+            ('titles_top', get(anon, '/api/v1/titles/top/')),
+            ('titles_trending', get(anon, '/api/v1/titles/trending/')),
+            ('categories_list', get(anon, '/api/v1/categories/')),
+            ('genres_list', get(anon, '/api/v1/genres/')),
+            ('genres_search',
+             get(anon, '/api/v1/genres/', {'search': genre.name})),
+            ('reviews_list',
+             get(anon, '/api/v1/titles/{}/reviews/'.format(title.pk))),
+            ('reviews_list_deep_offset', get(
+                anon, '/api/v1/titles/{}/reviews/'.format(title.pk),
+                {'offset': max(title.reviews_total - 10, 0)}
+            )),
+            ('reviews_list_cursor', get(
+                anon, '/api/v1/titles/{}/reviews/'.format(title.pk),
+                {'cursor': ''}
+            )),
+            ('reviews_detail',
+             get(anon, '{}{}/'.format(reviews_url, review.pk))),
+            ('comments_list', get(anon, comments_url)),
+            ('comments_detail',
+             get(anon, '{}{}/'.format(comments_url, comment.pk))),
+            ('users_list', get(admin_client, '/api/v1/users/')),
+            ('users_detail', get(
+                admin_client, '/api/v1/users/{}/'.format(user.username)
+            )),
+            ('users_me', get(user_client, '/api/v1/users/me/')),
+            ('metrics', get(admin_client, '/api/v1/metrics/')),
+            ('export_titles_ndjson',
+             get(admin_client, '/api/v1/export/titles.ndjson')),
+            ('export_reviews_csv',
+             get(admin_client, '/api/v1/export/reviews.csv')),
+            ('export_comments_ndjson', get(
+                admin_client, '/api/v1/export/comments.ndjson',
+                {'since': review.pub_date.isoformat()}
+            )),
+            ('titles_batch', titles_batch),
+            ('reviews_batch', reviews_batch),
+            ('auth_signup', signup),
+            ('auth_token', token),
+        )
+
+    def print_results(self, results):
+        row = '{:<28}{:>8}{:>10}{:>10}{:>10}{:>9}{:>10}'
+        self.stdout.write(row.format(
+            'scenario', 'status', 'p50 ms', 'p95 ms', 'p99 ms',
+            'queries', 'bytes'
+        ))
+        for name, result in results['results'].items():
+            self.stdout.write(row.format(
+                name, result['status'], result['p50_ms'], result['p95_ms'],
+                result['p99_ms'], result['queries'], result['bytes']
+            ))
+
+        row = '{:<28}{:>8}{:>14}{:>14}{:>11}'
+        self.stdout.write(row.format(
+            'serializer', 'rows', 'drf us/row', 'values us/row', 'identical'
+        ))
+        for name, result in results['serializers'].items():
+            self.stdout.write(row.format(
+                name, result['rows'], result['drf_us_per_row'],
+                result['values_us_per_row'], str(result['identical'])
+            ))
+        row = '{:<28}{:<10}{:>12}{:>10}{:>10}'
+        self.stdout.write(row.format(
+            'rows', 'renderer', 'encode ms', 'MB/s', 'bytes'
+        ))
+        for name, renderers in results['renderers'].items():
+            for renderer, result in renderers.items():
+                self.stdout.write(row.format(
+                    name, renderer, result['encode_ms'], result['mb_per_s'],
+                    result['bytes']
+                ))
+
+    def report_regressions(self, baseline, current, threshold):
+        regressions = find_regressions(baseline, current, threshold)
+        for name, metric, old, new in regressions:
+            self.stderr.write(self.style.ERROR(
+                '{}: {} {} -> {}'.format(name, metric, old, new)
+            ))
+        if regressions:
+            raise CommandError(
+                '{} regressions beyond {}%'.format(len(regressions), threshold)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'No regressions beyond {}%'.format(threshold)
+        ))
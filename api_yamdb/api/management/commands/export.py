@@ -0,0 +1,59 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import (CHUNK_SIZE, CONTENT_TYPES, EXPORTS, ExportError,
+                       export_stream, parse_since)
+
+
+class Command(BaseCommand):
+    '''
+    The same stream as /api/v1/export/<name>.<format>: rows are read
+    with a server-side cursor in chunks, so memory use does not
+    depend on the table size.
+    '''
+    help = 'Export titles, reviews or comments as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=sorted(CONTENT_TYPES),
+            default='ndjson'
+        )
+        parser.add_argument(
+            '--since',
+            help='Only reviews or comments published since this '
+                 'ISO 8601 date or datetime'
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write to (stdout by default)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress the output with gzip'
+        )
+        parser.add_argument('--chunk_size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            stream = export_stream(
+                options['name'], options['export_format'],
+                parse_since(options['since']) if options['since'] else None,
+                options['gzip'], options['chunk_size']
+            )
+        except ExportError as error:
+            raise CommandError(error)
+        if not options['output']:
+            self.write(stream, sys.stdout.buffer)
+            return
+        with open(options['output'], 'wb') as file_object:
+            self.write(stream, file_object)
+
+    def write(self, stream, file_object):
+        for chunk in stream:
+            file_object.write(chunk)
+        file_object.flush()
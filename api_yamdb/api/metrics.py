@@ -0,0 +1,376 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Как часто процесс сбрасывает свои метрики в METRICS_DIR, секунд.
+FLUSH_INTERVAL = 1
+# Сумма метрик завершившихся процессов (см. archive_process).
+ARCHIVE_FILE = 'archive.json'
+
+FAMILIES = {
+    'yamdb_http_requests_total': (
+        'counter', 'HTTP requests by view, method and status.'
+    ),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Request latency, seconds.'
+    ),
+    'yamdb_db_queries': ('histogram', 'SQL queries per request.'),
+    'yamdb_db_duration_seconds': (
+        'histogram', 'Time spent in SQL queries per request, seconds.'
+    ),
+    'yamdb_serializer_duration_seconds': (
+        'histogram', 'Time spent in serializers per request, seconds.'
+    ),
+    'yamdb_cache_requests_total': (
+        'counter', 'Response cache lookups by result.'
+    ),
+    'yamdb_throttled_requests_total': (
+        'counter', 'Requests rejected by throttles.'
+    ),
+}
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+SAMPLE_FAMILIES = {
+    name + suffix: name
+    for name, (kind, _) in FAMILIES.items()
+    for suffix in (HISTOGRAM_SUFFIXES if kind == 'histogram' else ('',))
+}
+
+_local = threading.local()
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\')
+            .replace('"', '\\"').replace('\n', '\\n'))
+
+
+def sample_key(name, labels):
+    '''
+    Ключ хранения - готовая строка сэмпла Prometheus без значения:
+    name{label="value",...}.
+    '''
+    return '{}{{{}}}'.format(name, ','.join(
+        '{}="{}"'.format(label, escape(value)) for label, value in labels
+    ))
+
+
+def render(samples):
+    '''
+    Текстовый формат Prometheus (version 0.0.4).
+    '''
+    grouped = {name: [] for name in FAMILIES}
+    for key, value in samples.items():
+        family = SAMPLE_FAMILIES.get(key.split('{', 1)[0])
+        if family is not None:
+            grouped[family].append('{} {}'.format(key, value))
+    lines = []
+    for name, (kind, help_text) in FAMILIES.items():
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} {}'.format(name, kind))
+        lines.extend(grouped[name])
+    return '\n'.join(lines) + '\n'
+
+
+class RequestStats:
+    '''
+    Данные одного запроса, которые собирают обертка SQL-запросов,
+    сериализаторы и кэш ответов.
+    '''
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.serializer_time = 0
+        self.cache = Counter()
+
+    def query_timer(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def count_cache(result):
+    '''
+    Учитывает обращение к кэшу ответов: hit, miss или not_modified.
+    '''
+    stats = current_stats()
+    if stats is not None:
+        stats.cache[result] += 1
+
+
+@contextmanager
+def serializer_timer():
+    '''
+    Добавляет время блока ко времени сериализаторов запроса.
+    '''
+    stats = current_stats()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serializer_time += time.perf_counter() - started
+
+
+def write_json(path, data):
+    '''
+    Атомарная запись: читатели видят старый или новый файл целиком.
+    '''
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file_object:
+        json.dump(data, file_object)
+    os.replace(temp_path, path)
+
+
+def read_archive():
+    path = os.path.join(settings.METRICS_DIR, ARCHIVE_FILE)
+    try:
+        with open(path) as file_object:
+            return json.load(file_object)
+    except (OSError, ValueError):
+        return {'samples': {}, 'merged': []}
+
+
+def clear_metrics_dir():
+    '''
+    Удаляет метрики прежних запусков. Вызывается мастером gunicorn
+    при старте (on_starting в gunicorn.conf.py), до запуска воркеров.
+    '''
+    if not settings.METRICS_DIR:
+        return
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*')):
+        os.remove(path)
+
+
+def archive_process(pid):
+    '''
+    Переносит метрики завершившегося процесса в ARCHIVE_FILE, чтобы
+    счетчики не уменьшались при перезапуске воркеров, а файлы не
+    копились. Вызывается мастером gunicorn (child_exit), поэтому
+    архив пишет один процесс.
+
+    Сначала записывается архив со списком перенесенных файлов
+    (читатели их пропускают), затем файлы удаляются.
+    '''
+    if not settings.METRICS_DIR:
+        return
+    paths = glob.glob(
+        os.path.join(settings.METRICS_DIR, '{}-*.json'.format(pid))
+    )
+    archive = read_archive()
+    samples = Counter(archive['samples'])
+    merged = []
+    for path in paths:
+        try:
+            with open(path) as file_object:
+                samples.update(json.load(file_object))
+        except (OSError, ValueError):
+            pass
+        merged.append(os.path.basename(path))
+    write_json(os.path.join(settings.METRICS_DIR, ARCHIVE_FILE), {
+        'samples': samples, 'merged': merged
+    })
+    for path in paths:
+        os.remove(path)
+    for path in glob.glob(
+        os.path.join(settings.METRICS_DIR, '{}-*.tmp'.format(pid))
+    ):
+        os.remove(path)
+
+
+class Registry:
+    '''
+    Метрики процесса.
+
+    Каждый процесс gunicorn периодически записывает свои значения
+    в отдельный файл в METRICS_DIR (атомарно, через os.replace;
+    перед завершением воркера - см. worker_exit в gunicorn.conf.py),
+    а эндпоинт метрик суммирует файлы всех процессов и архив
+    завершившихся (см. archive_process), поэтому счетчики
+    не уменьшаются при перезапуске воркеров.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.path = None
+        self.samples = {}
+        self.flushed_at = 0
+        self.timer = None
+
+    def inc(self, name, labels, value=1):
+        key = sample_key(name, labels)
+        self.samples[key] = self.samples.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        for bound in buckets:
+            if value <= bound:
+                self.inc(name + '_bucket', labels + (('le', bound),))
+        self.inc(name + '_bucket', labels + (('le', '+Inf'),))
+        self.inc(name + '_sum', labels, value)
+        self.inc(name + '_count', labels)
+
+    def record(self, view, method, status, duration, stats):
+        labels = (('view', view), ('method', method))
+        with self.lock:
+            if os.getpid() != self.pid:
+                # Процесс получен через fork: данные родителя не наши.
+                self.reset()
+            self.inc(
+                'yamdb_http_requests_total', labels + (('status', status),)
+            )
+            self.observe('yamdb_http_request_duration_seconds', labels,
+                         duration, LATENCY_BUCKETS)
+            self.observe('yamdb_db_queries', labels,
+                         stats.queries, QUERIES_BUCKETS)
+            self.observe('yamdb_db_duration_seconds', labels,
+                         stats.db_time, LATENCY_BUCKETS)
+            self.observe('yamdb_serializer_duration_seconds', labels,
+                         stats.serializer_time, LATENCY_BUCKETS)
+            for result, count in stats.cache.items():
+                self.inc('yamdb_cache_requests_total',
+                         labels + (('result', result),), count)
+            if status == 429:
+                self.inc('yamdb_throttled_requests_total', labels)
+            self.schedule_write()
+
+    def schedule_write(self):
+        '''
+        Файл записывается не чаще раза в FLUSH_INTERVAL. Если интервал
+        не истек, запись откладывается таймером: иначе последние
+        запросы процесса, который перестал получать запросы, не попали
+        бы в файл.
+        '''
+        remaining = self.flushed_at + FLUSH_INTERVAL - time.monotonic()
+        if remaining <= 0:
+            self.write()
+        elif self.timer is None:
+            self.timer = threading.Timer(remaining, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            if os.getpid() == self.pid:
+                self.write()
+
+    def write(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not settings.METRICS_DIR:
+            return
+        if self.path is None:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            self.path = os.path.join(settings.METRICS_DIR, '{}-{}.json'.format(
+                self.pid, uuid.uuid4().hex
+            ))
+        write_json(self.path, self.samples)
+        self.flushed_at = time.monotonic()
+
+    def collect(self):
+        '''
+        Сумма метрик всех процессов.
+        '''
+        with self.lock:
+            self.write()
+            if not settings.METRICS_DIR:
+                return dict(self.samples)
+        while True:
+            samples = self.read_processes()
+            if samples is not None:
+                return samples
+
+    def read_processes(self):
+        '''
+        Список файлов читается до архива: файл, которого уже нет
+        в списке, к этому моменту есть в архиве. Если файл из списка
+        перенесен в архив во время чтения, возвращается None, и
+        чтение повторяется.
+        '''
+        paths = glob.glob(os.path.join(settings.METRICS_DIR, '*.json'))
+        archive = read_archive()
+        skipped = {ARCHIVE_FILE, *archive['merged']}
+        samples = Counter(archive['samples'])
+        for path in paths:
+            if os.path.basename(path) in skipped:
+                continue
+            try:
+                with open(path) as file_object:
+                    samples.update(json.load(file_object))
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError):
+                continue
+        return samples
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    '''
+    Время ответа, число и время SQL-запросов, время сериализаторов,
+    обращения к кэшу и отказы троттлинга для каждого представления
+    (имя маршрута) и HTTP-метода.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _local.stats = RequestStats()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.stats = None
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else 'unresolved', request.method,
+            response.status_code, time.perf_counter() - started, stats
+        )
+        return response
+
+
+class TimedSerializerMixin:
+    '''
+    Учитывает время to_representation сериализаторов верхнего уровня
+    (для списков - сумму по элементам); вложенные сериализаторы входят
+    во время родителя.
+    '''
+
+    def to_representation(self, instance):
+        root = self.parent
+        if root is not None and root.parent is None and getattr(
+            root, 'many', False
+        ):
+            root = None
+        if root is not None:
+            return super().to_representation(instance)
+        with serializer_timer():
+            return super().to_representation(instance)
@@ -0,0 +1,151 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        name[1:] if name.startswith('-') else '-' + name for name in ordering
+    )
+
+
+class CursorPagination(pagination.CursorPagination):
+    '''
+    Позиция курсора - значения всех полей ordering (последнее - id),
+    а не только первого, как в DRF, где совпадения первого поля
+    пропускаются через offset: при равных pub_date переход по next
+    и previous не пропускает и не повторяет объекты.
+    '''
+    page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor and self.cursor.position
+        ordering = reverse_ordering(self.ordering) if reverse else (
+            self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(
+                ordering, self.parse_position(queryset.model, position)
+            ))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, ordering, values):
+        '''
+        Строки строго после позиции в порядке ordering. Для (a, b)
+        условие a >= x AND (a > x OR b > y): первая часть - диапазон
+        по индексу (pub_date, id).
+        '''
+        condition = None
+        for name, value in reversed(list(zip(ordering, values))):
+            lookup = '{}__{}'.format(
+                name.lstrip('-'), 'lt' if name.startswith('-') else 'gt'
+            )
+            strictly = Q(**{lookup: value})
+            if condition is None:
+                condition = strictly
+            else:
+                condition = Q(**{lookup + 'e': value}) & (
+                    strictly | condition
+                )
+        return condition
+
+    def parse_position(self, model, position):
+        try:
+            values = json.loads(position)
+            fields = [
+                model._meta.get_field(name.lstrip('-'))
+                for name in self.ordering
+            ]
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError(position)
+            return [
+                field.to_python(value) for field, value in zip(fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_position(self, item):
+        return json.dumps([
+            str(getattr(item, name.lstrip('-'))) for name in self.ordering
+        ])
+
+    def get_next_link(self):
+        '''
+        С пустой страницы назад - первая страница (position None).
+        '''
+        if not self.has_next:
+            return None
+        position = self.get_position(self.page[-1]) if self.page else None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=False, position=position
+        ))
+
+    def get_previous_link(self):
+        '''
+        С пустой страницы за концом - последняя страница.
+        '''
+        if not self.has_previous:
+            return None
+        position = self.get_position(self.page[0]) if self.page else None
+        return self.encode_cursor(pagination.Cursor(
+            offset=0, reverse=True, position=position
+        ))
+
+
+class OptionalCursorPagination(pagination.LimitOffsetPagination):
+    '''
+    По умолчанию работает как обычная limit/offset пагинация.
+
+    Если в запросе есть параметр cursor (для первой страницы - пустой),
+    включается курсорная пагинация по ключу (pub_date, id) в порядке
+    Meta.ordering модели: каждая следующая страница выбирается
+    условием по индексу, а не пропуском offset строк.
+    '''
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = CursorPagination()
+        self.cursor_paginator.cursor_query_param = self.cursor_query_param
+        self.cursor_paginator.ordering = self.get_cursor_ordering(queryset)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
+
+    def get_cursor_ordering(self, queryset):
+        '''
+        Meta.ordering модели, дополненный id в том же направлении,
+        чтобы порядок был однозначным.
+        '''
+        ordering = tuple(queryset.model._meta.ordering)
+        if ordering[0].startswith('-'):
+            return ordering + ('-id',)
+        return ordering + ('id',)
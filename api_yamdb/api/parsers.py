@@ -0,0 +1,43 @@
+import codecs
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from .renderers import MessagePackRenderer, OrjsonRenderer
+
+
+class OrjsonParser(parsers.JSONParser):
+    '''
+    JSONParser на orjson. orjson читает только UTF-8; тела
+    в других кодировках разбирает JSONParser.
+    '''
+    renderer_class = OrjsonRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != 'utf-8' or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - {}'.format(exc))
+
+
+class MessagePackParser(parsers.BaseParser):
+    '''
+    Тело запроса в MessagePack (Content-Type: application/msgpack).
+    '''
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - {}'.format(
+                exc or type(exc).__name__
+            ))
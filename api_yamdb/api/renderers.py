@@ -0,0 +1,74 @@
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+# Символы, которые JSONRenderer экранирует, чтобы JSON оставался
+# подмножеством JavaScript.
+LINE_SEPARATORS = (('\u2028'.encode(), b'\\u2028'),
+                   ('\u2029'.encode(), b'\\u2029'))
+
+
+# Типы, которых нет в JSON и MessagePack (даты, Decimal, UUID,
+# ленивые строки), приводятся так же, как в JSONRenderer.
+encode_default = JSONEncoder().default
+
+
+class OrjsonRenderer(renderers.JSONRenderer):
+    '''
+    JSONRenderer на orjson: байты ответа те же, что у стандартного
+    json в компактном режиме, даты по-прежнему выводит JSONEncoder.
+    С отступами (Accept: application/json; indent=4, браузерная
+    версия API) и для данных, которые orjson не кодирует (целые
+    больше 64 бит), работает JSONRenderer.
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=encode_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for char, escaped in LINE_SEPARATORS:
+            if char in ret:
+                ret = ret.replace(char, escaped)
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    '''
+    MessagePack по заголовку Accept: application/msgpack
+    (или ?format=msgpack).
+    '''
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    '''
+    Текстовый формат Prometheus; ошибки (например, 403)
+    выводятся текстом сообщения.
+    '''
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(str(value) for value in data.values()) + '\n'
+        return data.encode(self.charset)
@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+
+PRIMARY_COOKIE = 'db_primary'
+PRIMARY_USER_KEY = 'db:primary:user:{}'
+
+_local = threading.local()
+
+
+def current_replica():
+    return getattr(_local, 'replica', None)
+
+
+def read_from_primary_if_modified(last_modified):
+    '''
+    Изменения последних REPLICA_STICKY_SECONDS реплика могла еще
+    не получить. Ответ, который попадет в общий кэш или получит
+    ETag новой версии (см. api/cache.py, api/conditional.py),
+    в этом случае читается с default, иначе устаревшие данные
+    достались бы и тем, кто закреплен за default.
+    '''
+    if time.time() - last_modified < settings.REPLICA_STICKY_SECONDS:
+        _local.replica = None
+
+
+def token_user_id(request):
+    '''
+    id пользователя из access-токена без проверки подписи:
+    он выбирает только базу для чтения, права проверяет
+    аутентификация DRF.
+    '''
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        payload = token_backend.decode(raw_token, verify=False)
+    except TokenBackendError:
+        return None
+    return payload.get(api_settings.USER_ID_CLAIM)
+
+
+class ReplicaRouter:
+    '''
+    Чтение - с реплики, выбранной ReplicaMiddleware для запроса,
+    запись - всегда в default. Внутри транзакции на default
+    чтение тоже идет в default, чтобы видеть свои изменения.
+    '''
+
+    def db_for_read(self, model, **hints):
+        replica = current_replica()
+        if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        '''
+        Схему реплик меняет репликация, а не migrate.
+        '''
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        '''
+        Реплики содержат те же данные, что и default.
+        '''
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db}.issubset(databases):
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    '''
+    Безопасные запросы к представлениям DRF читают с одной из
+    реплик (DATABASE_REPLICAS), остальные запросы - с default.
+
+    После успешного изменяющего запроса клиент на
+    REPLICA_STICKY_SECONDS закрепляется за default - по cookie
+    и по id пользователя (для клиентов без cookie), - чтобы
+    следующие чтения видели его изменения даже при отставании
+    реплики.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.replica = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin_to_primary(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and hasattr(view_func, 'cls')
+                and not self.is_pinned(request)):
+            _local.replica = random.choice(settings.DATABASE_REPLICAS)
+
+    def is_pinned(self, request):
+        if PRIMARY_COOKIE in request.COOKIES:
+            return True
+        user_id = token_user_id(request)
+        return (user_id is not None
+                and cache.get(PRIMARY_USER_KEY.format(user_id)) is not None)
+
+    def pin_to_primary(self, request, response):
+        response.set_cookie(
+            PRIMARY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True, samesite='Lax'
+        )
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(PRIMARY_USER_KEY.format(user.pk), True,
+                      settings.REPLICA_STICKY_SECONDS)
@@ -0,0 +1,221 @@
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+
+from .metrics import serializer_timer
+
+# Поля, у которых to_representation не меняет значение из БД
+# (str от строки, int от числа): значение берется из строки как есть.
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField, serializers.SlugRelatedField,
+)
+
+
+def converted(get, to_representation):
+    '''
+    None выводится как есть, как в Serializer.to_representation.
+    '''
+    def getter(row):
+        value = get(row)
+        return None if value is None else to_representation(value)
+    return getter
+
+
+def related_placeholder(row):
+    return None
+
+
+class RowPlan:
+    '''
+    Вывод сериализатора чтения, собранный из строк values_list()
+    без создания объектов моделей.
+
+    Для каждого поля сериализатора один раз на запрос определяются
+    колонки выборки и функция, которая достает значение из строки.
+    Поля, которые DRF преобразует (даты), выводятся через
+    to_representation самого поля, поэтому ответ совпадает
+    с ответом сериализатора байт в байт.
+
+    Поддерживаются поля модели, связи (pk и slug), вложенные
+    сериализаторы по внешнему ключу (JOIN), многие-ко-многим
+    (один запрос на страницу, как prefetch_related) и свойства
+    модели, колонки которых перечислены в field_sources.
+    '''
+
+    def __init__(self, serializer, model=None, prefix='', columns=None):
+        self.model = model or serializer.Meta.model
+        self.prefix = prefix
+        self.columns = [] if columns is None else columns
+        self.pk_index = self.column(self.model._meta.pk.name)
+        self.getters = []
+        self.related = []
+        for name, field in serializer.fields.items():
+            getter = self.compile(serializer, field)
+            if getter is not None:
+                self.getters.append((name, getter))
+
+    def column(self, lookup):
+        lookup = self.prefix + lookup
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def compile(self, serializer, field):
+        '''
+        Функция row -> значение поля; None - поле не выводится.
+        '''
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return self.compile_property(serializer, field)
+        if isinstance(field, serializers.ListSerializer):
+            self.related.append((
+                field.field_name, model_field.related_query_name(),
+                RowPlan(field.child, model_field.related_model)
+            ))
+            # Место поля в ответе; значение подставит represent.
+            return related_placeholder
+        if isinstance(field, serializers.BaseSerializer):
+            return self.compile_nested(field, model_field)
+        lookup = field.source
+        if isinstance(field, serializers.SlugRelatedField):
+            lookup = '{}__{}'.format(field.source, field.slug_field)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            lookup = model_field.attname
+        get = itemgetter(self.column(lookup))
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return get
+        return converted(get, field.to_representation)
+
+    def compile_nested(self, field, model_field):
+        '''
+        Вложенный объект по внешнему ключу: колонки связанной
+        модели добавляются в ту же выборку (LEFT JOIN).
+        '''
+        nested = RowPlan(
+            field, model_field.related_model,
+            '{}{}__'.format(self.prefix, model_field.name), self.columns
+        )
+        is_null = itemgetter(nested.pk_index)
+        getters = nested.getters
+
+        def getter(row):
+            if is_null(row) is None:
+                return None
+            return {name: get(row) for name, get in getters}
+        return getter
+
+    def compile_property(self, serializer, field):
+        '''
+        Свойство модели вычисляется на самой строке: у строк
+        values_list(named=True) есть атрибуты с именами колонок.
+        Полей, которых нет у модели (например, title у комментария),
+        нет и в ответе сериализатора - они пропускаются.
+        '''
+        attribute = getattr(self.model, field.source, None)
+        if attribute is None:
+            return None
+        sources = getattr(serializer, 'field_sources', {}).get(
+            field.field_name
+        )
+        if sources is None or not isinstance(attribute, property):
+            raise ImproperlyConfigured(
+                'Поле {}.{} нельзя вывести из строк values_list(): '
+                'укажите его колонки в field_sources.'.format(
+                    type(serializer).__name__, field.field_name
+                )
+            )
+        for lookup in sources:
+            self.column(lookup)
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return attribute.fget
+        return converted(attribute.fget, field.to_representation)
+
+    def values(self, queryset, ordering=()):
+        '''
+        Выборка строк для плана. Колонки сортировки (нужны курсорной
+        пагинации) добавляются в выборку.
+        '''
+        for lookup in ordering:
+            self.column(lookup.lstrip('-'))
+        return queryset.select_related(None).prefetch_related(
+            None
+        ).values_list(*self.columns, named=True)
+
+    def represent(self, rows):
+        items = [
+            {name: get(row) for name, get in self.getters} for row in rows
+        ]
+        pks = [row[self.pk_index] for row in rows]
+        for name, query_name, plan in self.related:
+            related = plan.fetch(query_name, pks)
+            for pk, item in zip(pks, items):
+                item[name] = related[pk]
+        return items
+
+    def fetch(self, query_name, pks):
+        '''
+        {pk родителя: [объект, ...]} для связи многие-ко-многим,
+        одним запросом с тем же JOIN, что у prefetch_related.
+        '''
+        related = defaultdict(list)
+        if not pks:
+            return related
+        rows = self.model.objects.filter(**{
+            query_name + '__in': pks
+        }).values_list(query_name, *self.columns)
+        for row in rows:
+            values = row[1:]
+            related[row[0]].append(
+                {name: get(values) for name, get in self.getters}
+            )
+        return related
+
+
+class RowSerializer:
+    '''
+    Заменяет сериализатор чтения в list и retrieve
+    (см. ValuesReadMixin): data собирается планом из строк.
+    '''
+
+    def __init__(self, plan, instance, many=False):
+        self.plan = plan
+        self.instance = instance
+        self.many = many
+
+    @property
+    def data(self):
+        rows = self.instance if self.many else [self.instance]
+        with serializer_timer():
+            items = self.plan.represent(rows)
+        return items if self.many else items[0]
+
+
+class ValuesReadMixin:
+    '''
+    list и retrieve выбирают строки values_list() по плану
+    сериализатора чтения (см. RowPlan) вместо объектов моделей.
+    Браузерная версия API строит формы по объектам, поэтому
+    для нее остается обычный путь.
+    '''
+    values_actions = ('list', 'retrieve')
+    row_plan = None
+
+    def use_values(self):
+        return (self.action in self.values_actions
+                and self.request.accepted_renderer.format != 'api')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.use_values():
+            return queryset
+        self.row_plan = RowPlan(super().get_serializer())
+        return self.row_plan.values(queryset, queryset.model._meta.ordering)
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.row_plan is not None:
+            return RowSerializer(self.row_plan, *args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -1,58 +1,179 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.models import (SCORE_FIELDS, Category, Comment, Genre, Review,
+                            Title)
 
-from .custom_fields import CurrentTitleDefault
+from .custom_fields import (CurrentTitleDefault,
+                            PrefetchedPrimaryKeyRelatedField,
+                            PrefetchedSlugRelatedField)
+from .fieldsets import SparseFieldsetSerializerMixin
+from .metrics import TimedSerializerMixin
 
 User = get_user_model()
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetSerializerMixin, TimedSerializerMixin,
+                         serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug')
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsetSerializerMixin, TimedSerializerMixin,
+                      serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug')
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsetSerializerMixin, TimedSerializerMixin,
+                          serializers.ModelSerializer):
     '''
     Сериализатор для отображения одного или нескольких title.
-    Поле rating получается из модели Title.
+    Поля rating и reviews_count получаются из счетчиков модели Title.
     '''
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField()
+    field_sources = {'rating': ('score_sum', 'score_count')}
 
     class Meta:
         model = Title
         fields = (
             'id', 'name', 'category', 'genre', 'year', 'description', 'rating',
+            'reviews_count',
         )
         read_only_fields = ('id',)
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class TitleStatsSerializer(SparseFieldsetSerializerMixin,
+                           TimedSerializerMixin, serializers.ModelSerializer):
+    '''
+    Распределение оценок произведения, среднее, медиана
+    и число оценок - по счетчикам в модели Title.
+    '''
+    count = serializers.IntegerField(source='score_count')
+    mean = serializers.FloatField(source='score_mean')
+    median = serializers.FloatField(source='score_median')
+    distribution = serializers.DictField(
+        child=serializers.IntegerField(), source='score_distribution'
+    )
+    field_sources = {
+        'mean': ('score_sum', 'score_count'),
+        'median': ('score_count', *SCORE_FIELDS),
+        'distribution': SCORE_FIELDS,
+    }
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'mean', 'median', 'distribution')
+
+
+def parse_title_id(item):
+    try:
+        return int(item['title'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    '''
+    Пакетное создание объектов.
+
+    Связанные объекты всей пачки загружаются заранее, по одному
+    запросу на модель (см. prefetch_related_objects), и поля
+    Prefetched*RelatedField берут их из контекста. Ошибки
+    возвращаются списком, по одному элементу на объект пачки.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('allow_empty', False)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > settings.BATCH_MAX_SIZE:
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        'Не больше {} объектов за один запрос.'.format(
+                            settings.BATCH_MAX_SIZE
+                        )
+                    ]
+                })
+            self.context['related_objects'] = self.prefetch_related_objects(
+                data
+            )
+        return super().to_internal_value(data)
+
+    def prefetch_related_objects(self, items):
+        '''
+        Словарь {Model: {ключ: объект}} для всех объектов пачки;
+        по умолчанию поля загружают связанные объекты сами.
+        '''
+        return {}
+
+
+class TitleBatchListSerializer(BatchListSerializer):
+
+    def prefetch_related_objects(self, items):
+        category_slugs, genre_slugs = set(), set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            category_slugs.add(str(item.get('category')))
+            if isinstance(item.get('genre'), list):
+                genre_slugs.update(str(slug) for slug in item['genre'])
+        return {
+            model: {
+                obj.slug: obj
+                for obj in model.objects.filter(slug__in=slugs)
+            }
+            for model, slugs in ((Category, category_slugs),
+                                 (Genre, genre_slugs))
+        }
+
+    @transaction.atomic
+    def create(self, validated_data):
+        titles = Title.objects.bulk_create(
+            Title(genre_ids=sorted({genre.pk for genre in item['genre']}), **{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in validated_data
+        )
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title=title, genre=genre)
+            for title, item in zip(titles, validated_data)
+            for genre in set(item['genre'])
+        )
+        # Жанры для ответа - одним запросом на всю пачку.
+        prefetch_related_objects(titles, 'genre')
+        return titles
+
+
+class TitleWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     '''
     Сериализатор для создания, обновления и удаления title.
     '''
-    category = serializers.SlugRelatedField(queryset=Category.objects.all(),
-                                            slug_field='slug')
-    genre = serializers.SlugRelatedField(queryset=Genre.objects.all(),
-                                         slug_field='slug', many=True)
+    category = PrefetchedSlugRelatedField(queryset=Category.objects.all(),
+                                          slug_field='slug')
+    genre = PrefetchedSlugRelatedField(queryset=Genre.objects.all(),
+                                       slug_field='slug', many=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
+        list_serializer_class = TitleBatchListSerializer
 
 
-class CreateUpdateDestroyReviewSerializer(serializers.ModelSerializer):
+class CreateUpdateDestroyReviewSerializer(TimedSerializerMixin,
+                                          serializers.ModelSerializer):
     '''
     Сериализатор для создания, обновления и удаления review.
     Поля "author" и "title" скрыты и получаются через default поля.
@@ -78,7 +199,9 @@ class CreateUpdateDestroyReviewSerializer(serializers.ModelSerializer):
         )
 
 
-class ListRetrieveReviewSerializer(serializers.ModelSerializer):
+class ListRetrieveReviewSerializer(SparseFieldsetSerializerMixin,
+                                   TimedSerializerMixin,
+                                   serializers.ModelSerializer):
     '''
     Сериализатор для отоборажения одного или нескольких review.
     '''
@@ -90,11 +213,94 @@ class ListRetrieveReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date',)
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count',)
         read_only_fields = ('id', 'author', 'pub_date',)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class ReviewExportSerializer(ListRetrieveReviewSerializer):
+    '''
+    Отзыв в выгрузке (см. api/export.py): с id произведения.
+    '''
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(ListRetrieveReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date',)
+
+
+class ReviewBatchListSerializer(BatchListSerializer):
+    '''
+    Конфликты unique_review (с существующими отзывами автора
+    и внутри пачки) проверяются одним запросом и сообщаются
+    вместе с остальными ошибками объектов.
+    '''
+
+    def prefetch_related_objects(self, items):
+        title_ids = set(filter(None, map(parse_title_id, items)))
+        return {Title: {
+            title.pk: title
+            for title in Title.objects.filter(pk__in=title_ids).only('id')
+        }}
+
+    def to_internal_value(self, data):
+        try:
+            validated_data = super().to_internal_value(data)
+        except serializers.ValidationError as error:
+            if not isinstance(error.detail, list):
+                raise
+            validated_data, errors = None, error.detail
+        else:
+            errors = [{} for _ in validated_data]
+        self.add_conflict_errors(data, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def add_conflict_errors(self, items, errors):
+        title_ids = [parse_title_id(item) for item in items]
+        reviewed = set(Review.objects.filter(
+            author_id=self.context['request'].user.pk,
+            title_id__in=set(filter(None, title_ids))
+        ).values_list('title_id', flat=True))
+        for title_id, item_errors in zip(title_ids, errors):
+            if (title_id is None
+                    or api_settings.NON_FIELD_ERRORS_KEY in item_errors):
+                # Объект не разобран (не словарь или без title):
+                # проверять уникальность не по чему.
+                continue
+            if title_id in reviewed and 'title' not in item_errors:
+                item_errors['title'] = [
+                    'Вы уже оставили отзыв на это произведение.'
+                ]
+            reviewed.add(title_id)
+
+    def create(self, validated_data):
+        '''
+        ReviewQuerySet.bulk_create работает в транзакции
+        и обновляет агрегаты оценок произведений.
+        '''
+        author = self.context['request'].user
+        return Review.objects.bulk_create(
+            Review(author=author, **item) for item in validated_data
+        )
+
+
+class ReviewBatchSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    '''
+    Элемент пачки отзывов: произведение указывается в самом объекте.
+    '''
+    title = PrefetchedPrimaryKeyRelatedField(queryset=Title.objects.all())
+    score = serializers.IntegerField(min_value=1, max_value=10)
+
+    class Meta:
+        model = Review
+        fields = ('id', 'title', 'text', 'score')
+        list_serializer_class = ReviewBatchListSerializer
+
+
+class CommentSerializer(SparseFieldsetSerializerMixin, TimedSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -114,7 +320,8 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class BaseUserSerializer(serializers.ModelSerializer):
+class BaseUserSerializer(SparseFieldsetSerializerMixin, TimedSerializerMixin,
+                         serializers.ModelSerializer):
     '''
     Базовый сериализатор для управления пользователями.
     '''
@@ -173,7 +380,7 @@ class UserSignUpSerializer(AdminUserSerializer):
         fields = ('username', 'email',)
 
 
-class ObtainTokenSerializer(serializers.Serializer):
+class ObtainTokenSerializer(TimedSerializerMixin, serializers.Serializer):
     '''
     "Независимый" от модели сериализатор для обработки
     запросов на токены.
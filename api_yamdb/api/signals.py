@@ -0,0 +1,88 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_changed
+
+from .authentication import REVOKED, cache_user_state, user_state
+from .cache import BULK_GENERATION, bump_generation_on_commit
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_generation_on_commit(sender._meta.model_name)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres_cache(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_generation_on_commit(Title._meta.model_name)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_reviews_version(sender, instance, **kwargs):
+    bump_generation_on_commit('review:{}'.format(instance.title_id))
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_deleted_title_reviews_version(sender, instance, **kwargs):
+    '''
+    Список отзывов удаленного произведения становится 404,
+    даже если отзывов не было.
+    '''
+    bump_generation_on_commit('review:{}'.format(instance.pk))
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_review_comments_version(sender, instance, **kwargs):
+    '''
+    Список комментариев удаленного отзыва становится 404,
+    даже если комментариев не было.
+    '''
+    bump_generation_on_commit('comment:{}'.format(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_review_comments_on_write(sender, instance, **kwargs):
+    '''
+    Список отзывов произведения показывает comments_count,
+    поэтому меняется и его поколение. Если отзыв уже удален
+    каскадом, поколение сбросил сигнал самого отзыва.
+    '''
+    bump_generation_on_commit('comment:{}'.format(instance.review_id))
+    if Comment.review.is_cached(instance):
+        title_ids = [instance.review.title_id]
+    else:
+        title_ids = Review.objects.filter(
+            pk=instance.review_id
+        ).values_list('title_id', flat=True)
+    for title_id in title_ids:
+        bump_generation_on_commit('review:{}'.format(title_id))
+
+
+@receiver(bulk_changed)
+def invalidate_after_bulk_change(sender, models, **kwargs):
+    for model in models:
+        bump_generation_on_commit(model._meta.model_name)
+    bump_generation_on_commit(BULK_GENERATION)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_state(sender, instance, **kwargs):
+    '''
+    Смена роли или блокировка сразу отзывает выданные токены.
+    '''
+    cache_user_state(instance.pk, user_state(instance))
+
+
+@receiver(post_delete, sender=User)
+def revoke_user_state(sender, instance, **kwargs):
+    cache_user_state(instance.pk, REVOKED)
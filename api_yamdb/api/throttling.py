@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+
+def increment(cache, key, timeout):
+    '''
+    Атомарный счетчик: incr атомарен и в LocMem, и в общих
+    бэкендах (memcached, redis); отсутствующий ключ создается
+    через add без гонок.
+    '''
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout)
+        return cache.incr(key)
+
+
+class SlidingWindowMixin:
+    '''
+    Лимит по скользящему окну, приближенному двумя счетчиками:
+    текущего окна фиксированной длины и предыдущего, который
+    учитывается с долей, еще попадающей в скользящее окно.
+
+    Проверка - один get и один incr в кэше THROTTLE_CACHE вместо
+    чтения и записи списка отметок времени, как в DRF. Если кэш
+    общий (memcached, redis), лимит общий для всех процессов;
+    LocMem по умолчанию подходит для тестов и одного процесса.
+    Отклоненные запросы не расходуют лимит.
+    '''
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        window = int(window)
+        self.previous = self.cache.get(
+            '{}:{}'.format(self.key, window - 1), 0
+        )
+        current_key = '{}:{}'.format(self.key, window)
+        self.current = increment(self.cache, current_key, 2 * self.duration)
+        if self.estimate(self.previous, self.current) <= self.num_requests:
+            return True
+        self.cache.decr(current_key)
+        self.current -= 1
+        return self.throttle_failure()
+
+    def estimate(self, previous, current):
+        return previous * (1 - self.elapsed / self.duration) + current
+
+    def wait(self):
+        '''
+        Через сколько секунд оценка с учетом нового запроса
+        уложится в лимит.
+        '''
+        available = self.num_requests - 1
+        if self.current > available:
+            # В следующем окне текущее станет предыдущим.
+            return self.duration - self.elapsed + self.duration * max(
+                0, 1 - available / self.current
+            )
+        return max(0, self.duration * (
+            1 - (available - self.current) / self.previous
+        ) - self.elapsed)
+
+
+class UserThrottle(SlidingWindowMixin, throttling.UserRateThrottle):
+    pass
+
+
+class AnonThrottle(SlidingWindowMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class AuthThrottle(SlidingWindowMixin, throttling.SimpleRateThrottle):
+    '''
+    Отдельный лимит для auth/signup/ и auth/token/: каждый запрос
+    отправляет письмо или проверяет код подтверждения.
+    Считается по IP, независимо от общего лимита.
+    '''
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
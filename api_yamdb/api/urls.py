@@ -1,10 +1,10 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from .views import (AdminUserViewSet, CategoryViewSet, CommentViewSet,
-                    GenreViewSet, ReviewViewSet, TitlesViewSet,
-                    UserGetConfirmationCodeView, UserGetUpdateProfileView,
-                    user_obtain_token)
+                    ExportView, GenreViewSet, MetricsView, ReviewBatchView,
+                    ReviewViewSet, TitlesViewSet, UserGetConfirmationCodeView,
+                    UserGetUpdateProfileView, user_obtain_token)
 
 router = DefaultRouter()
 router.register('users', AdminUserViewSet)
@@ -22,5 +22,12 @@ urlpatterns = [
     path('v1/auth/token/', user_obtain_token),
     path('v1/auth/signup/', UserGetConfirmationCodeView.as_view()),
     path('v1/users/me/', UserGetUpdateProfileView.as_view()),
+    path('v1/metrics/', MetricsView.as_view()),
+    path('v1/reviews/batch/', ReviewBatchView.as_view()),
+    re_path(
+        r'^v1/export/(?P<name>titles|reviews|comments)'
+        r'\.(?P<export_format>ndjson|csv)$',
+        ExportView.as_view()
+    ),
     path('v1/', include(router.urls)),
 ]
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from reviews.models import OutgoingEmail
 
 EMAIL_MESSAGE = '''
     Добро пожаловать в YaMDb!.
@@ -21,17 +21,21 @@ EMAIL_MESSAGE = '''
 '''
 
 
-def send_confirmation_email(username, email, confirmation_code,
-                            raw_message=EMAIL_MESSAGE,
-                            token_url=settings.TOKEN_OBTAIN_URL,
-                            subject='Message from YaMDb Team!',
-                            *args, **kwargs):
+def queue_confirmation_email(username, email, confirmation_code,
+                             raw_message=EMAIL_MESSAGE,
+                             token_url=settings.TOKEN_OBTAIN_URL,
+                             subject='Message from YaMDb Team!',
+                             *args, **kwargs):
+    '''
+    Записывает письмо в очередь (OutgoingEmail) в текущей транзакции;
+    отправляет его команда sendoutbox, поэтому запрос не ждет
+    SMTP-сервер и не падает из-за его ошибок.
+    '''
     message = raw_message.format(username=username, code=confirmation_code,
                                  url=token_url)
-    send_mail(
+    return OutgoingEmail.objects.create(
         subject=subject,
-        message=message,
+        body=message,
         from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[email],
-        fail_silently=False,
+        recipient=email,
     )
@@ -1,23 +1,43 @@
+import re
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (filters, generics, mixins, permissions, status,
                             viewsets)
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title
-
+from rest_framework.views import APIView
+from reviews.models import (SCORE_FIELDS, Category, Comment, Genre, Review,
+                            Title)
+
+from .authentication import access_token_for
+from .cache import (BULK_GENERATION, CachedListMixin, CachedListRetrieveMixin,
+                    bump_generation_on_commit)
+from .conditional import ConditionalGetMixin
 from .custom_filters import CustomFilter
+from .export import CONTENT_TYPES, ExportError, export_stream, parse_since
+from .fieldsets import SparseFieldsetMixin
+from .metrics import registry, render
+from .pagination import OptionalCursorPagination
 from .permission import AdminOnly, AuthorOrStaffOrReadOnly, ReadOnly
+from .renderers import PrometheusRenderer
+from .rows import ValuesReadMixin
 from .serializers import (AdminUserSerializer, CategorySerializer,
                           CommentSerializer,
                           CreateUpdateDestroyReviewSerializer, GenreSerializer,
                           ListRetrieveReviewSerializer, ObtainTokenSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
+                          ReviewBatchSerializer, TitleReadSerializer,
+                          TitleStatsSerializer, TitleWriteSerializer,
                           UserProfileSerializer, UserSignUpSerializer)
-from .utils import send_confirmation_email
+from .throttling import AuthThrottle
+from .utils import queue_confirmation_email
 
 User = get_user_model()
 
@@ -28,22 +48,103 @@ class CreateListDestroyMixin(mixins.CreateModelMixin, mixins.ListModelMixin,
     pass
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
+class BatchCreateMixin:
+    '''
+    Создание пачки объектов одним запросом (см. BatchListSerializer).
+    Массовая вставка не отправляет сигналы, поэтому поколения
+    кэша увеличиваются здесь.
+    '''
+
+    def batch_create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        objs = serializer.save()
+        for name in self.get_batch_generations(objs):
+            bump_generation_on_commit(name)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_batch_generations(self, objs):
+        '''
+        Поколения, которые меняет пачка; по умолчанию - поколение
+        модели представления.
+        '''
+        return (self.get_queryset().model._meta.model_name,)
+
+
+class TitlesViewSet(ValuesReadMixin, SparseFieldsetMixin, BatchCreateMixin,
+                    ConditionalGetMixin, CachedListRetrieveMixin,
+                    viewsets.ModelViewSet):
     '''Для работы с моделью произведений.'''
+    cache_generations = ('title', 'genre', 'category', 'review')
     queryset = Title.objects.all()
     serializer_class = TitleReadSerializer
     permission_classes = (ReadOnly | AdminOnly,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     filterset_class = CustomFilter
+    read_actions = ('list', 'retrieve', 'top', 'trending')
+    values_actions = read_actions
+
+    def get_queryset(self):
+        '''
+        Для чтения связи загружаются заранее, а рейтинг хранится
+        в самой модели: число запросов не зависит от размера страницы.
+        '''
+        queryset = super().get_queryset()
+        if self.action == 'top':
+            return queryset.with_relations().top()
+        if self.action == 'trending':
+            return queryset.with_relations().trending()
+        if self.action in self.read_actions:
+            return queryset.with_relations()
+        if self.action == 'stats':
+            return queryset.only('score_sum', 'score_count', *SCORE_FIELDS)
+        return queryset
 
     def get_serializer_class(self):
-        if self.action == 'retrieve' or self.action == 'list':
+        if self.action in self.read_actions:
             return TitleReadSerializer
+        if self.action == 'stats':
+            return TitleStatsSerializer
         return TitleWriteSerializer
 
+    def get_version_scopes(self):
+        return self.cache_generations
 
-class CategoryViewSet(CreateListDestroyMixin):
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        '''
+        Распределение оценок читается из счетчиков произведения
+        (одна строка по первичному ключу), а не из таблицы отзывов.
+        Кэш и условные запросы - как у retrieve.
+        '''
+        return self.retrieve(request, pk=pk)
+
+    @action(detail=False)
+    def top(self, request):
+        '''
+        Лучшие по средней оценке произведения; фильтры - как у list.
+        '''
+        return self.list(request)
+
+    @action(detail=False)
+    def trending(self, request):
+        '''
+        Произведения, о которых больше всего пишут в последнее время
+        (см. TitleQuerySet.trending); фильтры - как у list.
+        Порядок меняется только с новыми отзывами, поэтому
+        кэш и условные запросы работают, как у list.
+        '''
+        return self.list(request)
+
+    @action(detail=False, methods=('post',))
+    def batch(self, request):
+        return self.batch_create(request)
+
+
+class CategoryViewSet(SparseFieldsetMixin, CachedListMixin,
+                      CreateListDestroyMixin):
     '''Для работы с моделью категорий произведений.'''
+    cache_generations = ('category',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (ReadOnly | AdminOnly,)
@@ -53,8 +154,10 @@ class CategoryViewSet(CreateListDestroyMixin):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDestroyMixin):
+class GenreViewSet(SparseFieldsetMixin, CachedListMixin,
+                   CreateListDestroyMixin):
     '''Для работы с моделью жанров произведений.'''
+    cache_generations = ('genre',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (ReadOnly | AdminOnly,)
@@ -64,19 +167,38 @@ class GenreViewSet(CreateListDestroyMixin):
     lookup_field = 'slug'
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class NestedListMixin:
+    '''
+    Объекты вложенного маршрута выбираются одним запросом по id
+    родителя из адреса, без отдельной загрузки родителя.
+    Существование родителя проверяется, только если страница пуста:
+    непустая выборка уже доказывает, что он есть.
+    '''
+
+    def get_queryset(self):
+        return self.get_nested_queryset().with_author()
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
+
+
+class ReviewViewSet(ValuesReadMixin, SparseFieldsetMixin, NestedListMixin,
+                    ConditionalGetMixin, viewsets.ModelViewSet):
     '''
     Данный вьюсет используется два сериализатора.
     '''
     serializer_class = ListRetrieveReviewSerializer
     permission_classes = (AuthorOrStaffOrReadOnly,)
+    pagination_class = OptionalCursorPagination
 
-    def get_queryset(self):
-        title = self.get_title()
-        return title.reviews.all()
+    def get_nested_queryset(self):
+        return Review.objects.filter(title_id=self.kwargs.get('title_id'))
 
     def perform_create(self, serializer):
-        title = self.get_title()
+        title = self.get_parent()
         serializer.save(author=self.request.user, title=title)
 
     def get_serializer_class(self):
@@ -84,34 +206,67 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return ListRetrieveReviewSerializer
         return CreateUpdateDestroyReviewSerializer
 
-    def get_title(self):
+    def get_parent(self):
         title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, id=title_id)
+        return get_object_or_404(Title.objects.only('id'), id=title_id)
+
+    def get_version_scopes(self):
+        return (
+            'review:{}'.format(self.kwargs.get('title_id')), BULK_GENERATION
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ValuesReadMixin, SparseFieldsetMixin, NestedListMixin,
+                     ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (AuthorOrStaffOrReadOnly,)
+    pagination_class = OptionalCursorPagination
 
-    def get_queryset(self):
-        review = self.get_review()
-        return review.comments.all()
+    def get_nested_queryset(self):
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        )
 
     def perform_create(self, serializer):
-        review = self.get_review()
+        review = self.get_parent()
         serializer.save(author=self.request.user, review=review)
 
     def perform_destroy(self, instance):
         instance.delete()
         return Response(status=status.HTTP_200_OK)
 
-    def get_review(self):
+    def get_parent(self):
         review_id = self.kwargs.get('review_id')
         title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Review, id=review_id, title__id=title_id)
+        return get_object_or_404(
+            Review.objects.only('id'), id=review_id, title__id=title_id
+        )
+
+    def get_version_scopes(self):
+        return (
+            'comment:{}'.format(self.kwargs.get('review_id')), BULK_GENERATION
+        )
 
 
-class AdminUserViewSet(viewsets.ModelViewSet):
+class ReviewBatchView(BatchCreateMixin, generics.GenericAPIView):
+    '''
+    Пакетное создание отзывов текущего пользователя
+    на разные произведения.
+    '''
+    serializer_class = ReviewBatchSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        return self.batch_create(request)
+
+    def get_batch_generations(self, objs):
+        return ('review', *{
+            'review:{}'.format(review.title_id) for review in objs
+        })
+
+
+class AdminUserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     '''
     Используется администратором для
     выполнения всех действий с пользователем.
@@ -131,14 +286,19 @@ class AdminUserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'  # username вместо pk (id)
 
 
-class UserGetUpdateProfileView(generics.RetrieveUpdateAPIView):
+class UserGetUpdateProfileView(SparseFieldsetMixin,
+                               generics.RetrieveUpdateAPIView):
     '''
     Используется пользователем для управления своим профилем.
     '''
     serializer_class = UserProfileSerializer
 
     def get_object(self):
-        return self.request.user
+        '''
+        В request.user есть только поля из токена - профиль
+        загружается из БД.
+        '''
+        return get_object_or_404(User, pk=self.request.user.pk)
 
 
 class UserGetConfirmationCodeView(mixins.RetrieveModelMixin,
@@ -155,6 +315,7 @@ class UserGetConfirmationCodeView(mixins.RetrieveModelMixin,
     и НЕ ХРАНИТСЯ в атрибутах пользователя.
     '''
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthThrottle,)
     serializer_class = UserSignUpSerializer
 
     def retrieve(self, request, *args, **kwargs):
@@ -170,12 +331,15 @@ class UserGetConfirmationCodeView(mixins.RetrieveModelMixin,
         data = self.dispatch_credentials(data=None, serializer=True)
         return Response(data)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         '''
         Метод обработки post запросов.
         - пустой запрос: сообщение об ошибке, статус 400.
         - запрос с некорректными данными: сообщение об ошибке, статус 404.
         - запрос с корректными данными: пиьсмо на эл.почту.
+
+        Пользователь и письмо в очереди создаются в одной транзакции.
         '''
         response = super().create(request, *args, **kwargs)
         self.dispatch_credentials(data=response.data)
@@ -185,14 +349,14 @@ class UserGetConfirmationCodeView(mixins.RetrieveModelMixin,
         '''
         Определяет GET и POST запросы.
         Формирует код подтверждения.
-        Направляет электронное письмо.
+        Ставит электронное письмо в очередь на отправку.
         '''
         user = self.get_object(**data) if data else self.get_object()
         if serializer:
             serializer = self.get_serializer(user)
             data = serializer.data
         token = PasswordResetTokenGenerator().make_token(user)
-        send_confirmation_email(**data, **{'confirmation_code': token})
+        queue_confirmation_email(**data, **{'confirmation_code': token})
         if serializer:
             return data
 
@@ -212,8 +376,64 @@ class UserGetConfirmationCodeView(mixins.RetrieveModelMixin,
         return get_object_or_404(User, **self.request.data)
 
 
+class MetricsView(APIView):
+    '''
+    Метрики всех процессов в формате Prometheus, только для админов.
+    '''
+    permission_classes = (AdminOnly,)
+    renderer_classes = (PrometheusRenderer,)
+    throttle_classes = ()
+
+    def get(self, request):
+        return Response(render(registry.collect()))
+
+
+class ExportView(APIView):
+    '''
+    Потоковая выгрузка произведений, отзывов и комментариев
+    в NDJSON или CSV, только для админов (см. api/export.py).
+
+    Параметр since (ISO 8601) оставляет отзывы и комментарии,
+    опубликованные не раньше этой даты. С Accept-Encoding: gzip
+    поток сжимается.
+    '''
+    permission_classes = (AdminOnly,)
+    accepts_gzip = re.compile(r'\bgzip\b')
+
+    def perform_content_negotiation(self, request, force=False):
+        '''
+        Формат выгрузки задает адрес; Accept выбирает
+        только формат ошибок.
+        '''
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, name, export_format):
+        since = request.query_params.get('since')
+        compress = bool(self.accepts_gzip.search(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        ))
+        try:
+            stream = export_stream(
+                name, export_format, parse_since(since) if since else None,
+                compress
+            )
+        except ExportError as error:
+            raise ValidationError({'since': [str(error)]})
+        response = StreamingHttpResponse(
+            stream, content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="{}.{}"'.format(name, export_format)
+        )
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthThrottle])
 def user_obtain_token(request):
     '''
     Если использовать сериализатор по модели User,
@@ -233,8 +453,7 @@ def user_obtain_token(request):
     user = get_object_or_404(User, **serializer.validated_data)
 
     if PasswordResetTokenGenerator().check_token(user, confirmation_code):
-        token = RefreshToken.for_user(user)
-        return Response({'access': str(token.access_token)})
+        return Response({'access': str(access_token_for(user))})
 
     serializer._errors.update({
         'confirmation_code': 'неверный код подтверждения'
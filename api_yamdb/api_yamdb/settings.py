@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 from decouple import Csv, config
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -100,6 +103,82 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения (см. api/replicas.py): через запятую
+# host[:port] для Postgres или путь к файлу для SQLite. Параметры
+# подключения, кроме адреса, - как у default. Пустое значение -
+# все запросы идут в default.
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+    config('DB_REPLICAS', cast=Csv(), default=''), 1
+):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = location
+    else:
+        host, _, port = location.partition(':')
+        replica.update(HOST=host, PORT=int(port or replica['PORT']))
+    DATABASES['replica_{}'.format(number)] = replica
+    DATABASE_REPLICAS.append('replica_{}'.format(number))
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Сколько секунд после изменяющего запроса клиент читает
+# с default, а не с реплик: должно превышать отставание реплик.
+# Отметка хранится в кэше, поэтому с репликами нужен общий
+# CACHE_BACKEND (проверка api.E001, см. api/checks.py).
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', cast=int, default=5)
+
+# Cache
+# По умолчанию - LocMem (свой кэш у каждого процесса gunicorn).
+# Для общего кэша укажите, например,
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# и CACHE_LOCATION=memcached:11211.
+# Общий бэкенд обязателен, если данные меняют команды
+# (loadtestdata --bulk, generatedata, rebuildratings, reconcilecounters):
+# поколения кэша и ETag они сбрасывают только в своем процессе,
+# и с LocMem процессы gunicorn нужно перезапустить (команды
+# предупреждают об этом).
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    },
+    # Счетчики троттлинга (см. api/throttling.py) - отдельно от кэша
+    # ответов, чтобы ответы не вытесняли их. Для общего лимита всех
+    # процессов укажите общий бэкенд, например memcached.
+    'throttle': {
+        'BACKEND': config(
+            'THROTTLE_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('THROTTLE_CACHE_LOCATION', default='throttle'),
+        'KEY_PREFIX': 'throttle',
+    },
+}
+THROTTLE_CACHE = 'throttle'
+
+# Время жизни закэшированных ответов каталога (titles, genres, categories)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', cast=int, default=300)
+
+# Сколько секунд процесс доверяет закэшированным роли и статусу
+# пользователя при проверке JWT (см. api/authentication.py)
+AUTH_STATE_CACHE_TIMEOUT = config('AUTH_STATE_CACHE_TIMEOUT', cast=int, default=60)
+
+# Metrics
+# Каталог, через который процессы gunicorn объединяют метрики
+# (см. api/metrics.py). Пустое значение - только метрики процесса.
+METRICS_DIR = config(
+    'METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'yamdb_metrics')
+)
+
+# Наибольшее число объектов в одном запросе пакетного создания
+# (titles/batch/, reviews/batch/)
+BATCH_MAX_SIZE = config('BATCH_MAX_SIZE', cast=int, default=1000)
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -149,16 +228,28 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'api.throttling.UserThrottle',
+        'api.throttling.AnonThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '1000/hour',
         'anon': '100/hour',
+        'auth': '20/hour',
     },
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.OrjsonRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.OrjsonParser',
+        'api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
         'PAGE_SIZE': 10,
@@ -0,0 +1,18 @@
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def on_starting(server):
+    from api.metrics import clear_metrics_dir
+    clear_metrics_dir()
+
+
+def worker_exit(server, worker):
+    from api.metrics import registry
+    registry.flush()
+
+
+def child_exit(server, worker):
+    from api.metrics import archive_process
+    archive_process(worker.pid)
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, EmailStatus, Genre, OutgoingEmail,
+                     Review, Title, User)
 
 
 @admin.register(User)
@@ -57,3 +59,23 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('author', 'review',)
     list_filter = ('author', 'review', 'pub_date',)
     empty_value_display = '--пусто--'
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient', 'subject', 'status', 'attempts', 'next_attempt_at',
+        'created', 'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    readonly_fields = ('last_error', 'created', 'sent_at',)
+    actions = ('requeue',)
+    empty_value_display = '--пусто--'
+
+    def requeue(self, request, queryset):
+        queryset.filter(status=EmailStatus.DEAD).update(
+            status=EmailStatus.PENDING, attempts=0,
+            next_attempt_at=timezone.now()
+        )
+    requeue.short_description = 'Отправить недоставленные письма повторно'
@@ -1,22 +1,127 @@
 import csv
+import io
+from itertools import islice
 
 from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.color import no_style
+from django.db import connection
 
 from ...models import Genre, Title
+from ...signals import bulk_changed
 
 PATH = settings.STATIC_ROOT + '/fixtures/'
 MODELS = ['user', 'genre', 'category', 'title', 'review', 'comment']
+GENRES_FILE = 'genre_title.csv'
+COPY_NULL = '\\N'
+LOCAL_CACHE_WARNING = (
+    'The cache backend is local to each process: running web workers '
+    'keep serving cached responses and ETags of the replaced data. '
+    'Restart them, or set CACHE_BACKEND to a shared backend.'
+)
 
 
 def add_genres():
     '''
     Add genres to titles.
     '''
-    file_name = 'genre_title.csv'
-    with open(PATH + file_name) as file_object:
+    with open(PATH + GENRES_FILE) as file_object:
         csv_file = csv.reader(file_object, delimiter=',')
         _ = next(csv_file)
         for row in csv_file:
             title = Title.objects.get(id=int(row[1]))
             genre = Genre.objects.get(id=int(row[2]))
             title.genre.add(genre)
+
+
+def read_rows(file_name):
+    '''
+    Stream csv file as row dicts.
+    '''
+    with open(PATH + file_name) as file_object:
+        yield from csv.DictReader(file_object, delimiter=',')
+
+
+def insert_stream(model, objs, batch_size):
+    '''
+    Insert objects from any iterable in batches of batch_size,
+    so only one batch is kept in memory. Return number of rows.
+    '''
+    objs = iter(objs)
+    rows = 0
+    for batch in iter(lambda: list(islice(objs, batch_size)), []):
+        insert_batch(model, batch)
+        rows += len(batch)
+    return rows
+
+
+def throughput_message(name, rows, elapsed):
+    return '{}: {} rows in {:.2f}s ({:.0f} rows/sec)'.format(
+        name, rows, elapsed, rows / elapsed if elapsed else rows
+    )
+
+
+def insert_batch(model, objs):
+    '''
+    Insert objects with COPY on Postgres and bulk_create elsewhere.
+    Field defaults apply in both cases. COPY keeps explicitly set
+    values of auto_now_add fields (dates from dumps or generated data),
+    bulk_create always overrides them.
+    '''
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(objs)
+        return
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        writer.writerow([
+            copy_value(field.get_db_prep_save(
+                field_value(obj, field), connection
+            ))
+            for field in fields
+        ])
+    buffer.seek(0)
+    sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL \'{}\')'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        COPY_NULL,
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def field_value(obj, field):
+    value = getattr(obj, field.attname)
+    if value is None:
+        return field.pre_save(obj, add=True)
+    return value
+
+
+def copy_value(value):
+    if isinstance(value, list):
+        # Array literal for integer arrays (Title.genre_ids).
+        return '{' + ','.join(str(item) for item in value) + '}'
+    return COPY_NULL if value is None else value
+
+
+def announce_bulk_change(command, models):
+    '''
+    Send bulk_changed, so that caches drop responses built on the
+    replaced data. A process-local cache is dropped only in this
+    process, which is worth a warning.
+    '''
+    bulk_changed.send(sender=command.__class__, models=models)
+    if isinstance(caches['default'], LocMemCache):
+        command.stderr.write(command.style.WARNING(LOCAL_CACHE_WARNING))
+
+
+def reset_sequences(models):
+    '''
+    Move id sequences past the ids loaded from csv files.
+    '''
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -0,0 +1,241 @@
+import datetime as dt
+import random
+import time
+from itertools import accumulate
+from math import floor, gcd
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from ...models import Category, Comment, Genre, Review, Title, User
+from ._common import (announce_bulk_change, insert_stream, reset_sequences,
+                      throughput_message)
+
+WORDS = (
+    'тень', 'город', 'море', 'звезда', 'ветер', 'дорога', 'огонь', 'сад',
+    'ночь', 'зима', 'остров', 'песня', 'время', 'мост', 'небо', 'камень',
+    'река', 'дом', 'свет', 'сон', 'война', 'мир', 'лето', 'берег', 'птица',
+    'shadow', 'city', 'river', 'night', 'dream', 'road', 'fire', 'garden',
+)
+# Оценки смещены к высоким, как в реальных каталогах.
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 16, 14, 10)
+GENRES_PER_TITLE = (1, 1, 1, 2, 2, 3)
+DATE_RANGE = dt.timedelta(days=5 * 365)
+
+
+def zipf_total(count, exponent):
+    '''
+    Normalizing constant: sum of rank ** -exponent for ranks 1..count.
+    '''
+    return sum(rank ** -exponent for rank in range(1, count + 1))
+
+
+def coprime_step(rng, size):
+    '''
+    Step of an affine permutation (start + i * step) % size:
+    visits every number below size exactly once.
+    '''
+    step = rng.randrange(1, size) if size > 1 else 1
+    while gcd(step, size) != 1:
+        step += 1
+    return step
+
+
+class Command(BaseCommand):
+    '''
+    Everything but dates is determined by --seed; dates are spread
+    over the last five years before the run.
+    New rows get ids after the existing ones, so the command can be
+    run on a non-empty database.
+    '''
+    help = ('Generate a deterministic synthetic dataset '
+            'for load and capacity testing.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=20000,
+            help='Target number of reviews, spread over titles by Zipf law '
+                 '(a title cannot have more reviews than there are users)'
+        )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=40000,
+            help='Target number of comments, spread over reviews by Zipf law'
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Zipf exponent for titles, genres and reviews popularity'
+        )
+        parser.add_argument('--batch_size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.now = timezone.now()
+        self.first_ids = {
+            model: (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+            for model in (User, Category, Genre, Title, Title.genre.through,
+                          Review, Comment)
+        }
+        self.write(User, self.generate_users())
+        self.write(Category, self.generate_categories())
+        self.write(Genre, self.generate_genres())
+        self.write(Title, self.generate_titles())
+        self.write(Title.genre.through, self.generate_title_genres())
+        reviews = self.write(Review, self.generate_reviews())
+        self.write(Comment, self.generate_comments(reviews))
+        reset_sequences(list(self.first_ids))
+        call_command('rebuildratings', stdout=self.stdout)
+        call_command('reconcilecounters', stdout=self.stdout)
+        announce_bulk_change(self, list(self.first_ids))
+
+    def write(self, model, objs):
+        started = time.monotonic()
+        rows = insert_stream(model, objs, self.options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(throughput_message(
+            model.__name__, rows, time.monotonic() - started
+        )))
+        return rows
+
+    def ids(self, model, count):
+        return range(self.first_ids[model], self.first_ids[model] + count)
+
+    def text(self, min_words, max_words):
+        return ' '.join(self.rng.choices(
+            WORDS, k=self.rng.randint(min_words, max_words)
+        ))
+
+    def pub_date(self):
+        return self.now - self.rng.random() * DATE_RANGE
+
+    def zipf_counts(self, total, size):
+        '''
+        Expected share of total for each popularity rank,
+        rounded randomly so the sum stays close to total.
+        '''
+        exponent = self.options['zipf']
+        norm = zipf_total(size, exponent)
+        for rank in range(1, size + 1):
+            expected = total * rank ** -exponent / norm
+            count = floor(expected)
+            if self.rng.random() < expected - count:
+                count += 1
+            yield count
+
+    def generate_users(self):
+        for pk in self.ids(User, self.options['users']):
+            yield User(
+                id=pk,
+                username='user{}'.format(pk),
+                email='user{}@yamdb.fake'.format(pk),
+            )
+
+    def generate_categories(self):
+        for pk in self.ids(Category, self.options['categories']):
+            yield Category(
+                id=pk, name='Категория {}'.format(pk),
+                slug='category-{}'.format(pk)
+            )
+
+    def generate_genres(self):
+        for pk in self.ids(Genre, self.options['genres']):
+            yield Genre(
+                id=pk, name='Жанр {}'.format(pk), slug='genre-{}'.format(pk)
+            )
+
+    def generate_titles(self):
+        categories = self.ids(Category, self.options['categories'])
+        for pk in self.ids(Title, self.options['titles']):
+            yield Title(
+                id=pk,
+                name=self.text(1, 4).capitalize(),
+                year=self.rng.randint(1900, self.now.year),
+                category_id=self.rng.choice(categories),
+                description=self.text(10, 40),
+            )
+
+    def generate_title_genres(self):
+        '''
+        Genres popularity has a long tail: a few genres are
+        linked to most titles.
+        '''
+        genres = self.ids(Genre, self.options['genres'])
+        cum_weights = list(accumulate(
+            rank ** -self.options['zipf'] for rank in range(1, len(genres) + 1)
+        ))
+        pk = self.first_ids[Title.genre.through]
+        for title_id in self.ids(Title, self.options['titles']):
+            title_genres = set(self.rng.choices(
+                genres, cum_weights=cum_weights,
+                k=self.rng.choice(GENRES_PER_TITLE)
+            ))
+            for genre_id in sorted(title_genres):
+                yield Title.genre.through(
+                    id=pk, title_id=title_id, genre_id=genre_id
+                )
+                pk += 1
+
+    def generate_reviews(self):
+        '''
+        Titles get reviews by popularity rank (Zipf law); ranks are
+        mapped to titles by an affine permutation. Authors of one title
+        are distinct users taken by a coprime step, so unique_review
+        holds without keeping any state in memory.
+        '''
+        titles = self.ids(Title, self.options['titles'])
+        users = self.ids(User, self.options['users'])
+        if not titles or not users:
+            return
+        title_start = self.rng.randrange(len(titles))
+        title_step = coprime_step(self.rng, len(titles))
+        pk = self.first_ids[Review]
+        counts = self.zipf_counts(self.options['reviews'], len(titles))
+        for rank, count in enumerate(counts):
+            title_id = titles[(title_start + rank * title_step) % len(titles)]
+            user_start = self.rng.randrange(len(users))
+            user_step = coprime_step(self.rng, len(users))
+            for i in range(min(count, len(users))):
+                yield Review(
+                    id=pk,
+                    title_id=title_id,
+                    author_id=users[(user_start + i * user_step) % len(users)],
+                    score=self.rng.choices(range(1, 11), SCORE_WEIGHTS)[0],
+                    text=self.text(5, 60),
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
+
+    def generate_comments(self, reviews_count):
+        reviews = self.ids(Review, reviews_count)
+        users = self.ids(User, self.options['users'])
+        if not reviews or not users:
+            return
+        review_start = self.rng.randrange(len(reviews))
+        review_step = coprime_step(self.rng, len(reviews))
+        pk = self.first_ids[Comment]
+        counts = self.zipf_counts(self.options['comments'], len(reviews))
+        for rank, count in enumerate(counts):
+            review_id = reviews[
+                (review_start + rank * review_step) % len(reviews)
+            ]
+            for _ in range(count):
+                yield Comment(
+                    id=pk,
+                    review_id=review_id,
+                    author_id=self.rng.choice(users),
+                    text=self.text(3, 30),
+                    pub_date=self.pub_date(),
+                )
+                pk += 1
@@ -1,9 +1,14 @@
 import csv
+import time
 
 from django.apps import apps
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from ._common import MODELS, PATH, add_genres
+from ...models import Review, Title
+from ._common import (GENRES_FILE, MODELS, PATH, add_genres,
+                      announce_bulk_change, insert_stream, read_rows,
+                      reset_sequences, throughput_message)
 
 
 class Command(BaseCommand):
@@ -26,11 +31,13 @@ class Command(BaseCommand):
         '''
         Populate all models with test data.
         '''
+        models = []
         for model_name in MODELS:
             success_message = 'Model {} populated with test data successfully!'
             error_message = 'An error occured while populating model {}!'
             try:
                 self.populate_model(model_name)
+                models.append(apps.get_model('reviews', model_name.title()))
                 self.stdout.write(self.style.SUCCESS(
                     success_message.format(model_name.title()))
                 )
@@ -39,17 +46,64 @@ class Command(BaseCommand):
                     error_message.format(model_name.title()))
                 )
                 print(e)
+        reset_sequences(models)
 
     def add_genres_to_titles(self, *args, **kwargs):
         success_message = 'Genres added to titles successfully!'
         error_message = 'An error occured while adding genres to titles!'
         try:
             add_genres()
+            reset_sequences([Title.genre.through])
             self.stdout.write(self.style.SUCCESS(success_message))
         except Exception as e:
             self.stderr.write(self.style.ERROR(error_message))
             print(e)
 
+    def populate_model_bulk(self, model, file_name, batch_size):
+        '''
+        Stream csv file into given model in batches.
+        '''
+        started = time.monotonic()
+        rows = insert_stream(
+            model,
+            (model(**payload) for payload in read_rows(file_name)),
+            batch_size
+        )
+        self.stdout.write(self.style.SUCCESS(throughput_message(
+            model.__name__, rows, time.monotonic() - started
+        )))
+
+    def populate_db_bulk(self, with_models=True, with_genres=True,
+                         batch_size=1000):
+        '''
+        Load all test data in one transaction: nothing is saved
+        if any file fails.
+        '''
+        models = []
+        try:
+            with transaction.atomic():
+                for model_name in MODELS if with_models else []:
+                    model = apps.get_model('reviews', model_name.title())
+                    models.append(model)
+                    self.populate_model_bulk(
+                        model, model_name + '.csv', batch_size
+                    )
+                if with_genres:
+                    models.append(Title.genre.through)
+                    self.populate_model_bulk(
+                        Title.genre.through, GENRES_FILE, batch_size
+                    )
+                Title.objects.recalculate_scores()
+                Title.objects.refresh_genre_ids()
+                Review.objects.recalculate_comments()
+                reset_sequences(models)
+            announce_bulk_change(self, models)
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(
+                'An error occured during bulk load! No data was saved.')
+            )
+            print(e)
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--with_genres',
@@ -67,9 +121,27 @@ class Command(BaseCommand):
             action='store_true',
             help='Only add genres to titles. Without populating models.'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Load csv files in batches inside one transaction '
+                 '(COPY on Postgres, bulk_create elsewhere)'
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Number of rows inserted at once in bulk mode'
+        )
 
     def handle(self, *args, **options):
-        if options['no_genres']:
+        if options['bulk']:
+            self.populate_db_bulk(
+                with_models=not options['genres_only'],
+                with_genres=not options['no_genres'],
+                batch_size=options['batch_size'],
+            )
+        elif options['no_genres']:
             self.populate_db()
             self.stdout.write(self.style.WARNING(
                 'Models were populated without genres being added to titles!')
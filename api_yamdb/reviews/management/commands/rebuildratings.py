@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Title
+from ._common import announce_bulk_change
+
+
+class Command(BaseCommand):
+    help = ('Rebuild stored title review counts, score sums and counts, '
+            'per-score counters, averages and trend scores from reviews.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids',
+            nargs='*',
+            type=int,
+            help='Rebuild only given titles (all titles by default)'
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Number of titles updated in one statement'
+        )
+
+    def handle(self, *args, **options):
+        titles = Title.objects.order_by('pk')
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        title_ids = titles.values_list('pk', flat=True)
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+        while True:
+            batch = list(title_ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            updated += Title.objects.filter(
+                pk__in=batch
+            ).recalculate_scores()
+            last_id = batch[-1]
+        announce_bulk_change(self, (Title,))
+        self.stdout.write(self.style.SUCCESS(
+            'Ratings rebuilt for {} titles!'.format(updated))
+        )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Comment, Review, Title, related_count, title_genre_ids
+from ._common import announce_bulk_change
+
+# (модель, сохраненное поле, выражение для фактического значения)
+COUNTERS = (
+    (Title, 'reviews_count', lambda: related_count(Review, 'title')),
+    (Review, 'comments_count', lambda: related_count(Comment, 'review')),
+    (Title, 'genre_ids', title_genre_ids),
+)
+
+
+class Command(BaseCommand):
+    help = ('Repair drifted review counts and genre id sets of titles '
+            'and comment counts of reviews. Only rows whose stored '
+            'value differs from the actual one are updated.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Number of rows checked in one statement'
+        )
+
+    def handle(self, *args, **options):
+        for model, field, actual in COUNTERS:
+            checked, repaired = self.reconcile(
+                model, field, actual(), options['batch_size']
+            )
+            self.stdout.write(self.style.SUCCESS(
+                '{}.{}: {} of {} rows repaired'.format(
+                    model.__name__, field, repaired, checked
+                )
+            ))
+        announce_bulk_change(self, (Title, Review))
+
+    def reconcile(self, model, field, actual, batch_size):
+        '''
+        Проход по первичному ключу пачками: каждая пачка - один
+        UPDATE, который сравнивает и исправляет счетчики на
+        текущем состоянии таблиц.
+        '''
+        ids = model.objects.order_by('pk').values_list('pk', flat=True)
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                return checked, repaired
+            repaired += model.objects.filter(pk__in=batch).exclude(
+                **{field: actual}
+            ).update(**{field: actual})
+            checked += len(batch)
+            last_id = batch[-1]
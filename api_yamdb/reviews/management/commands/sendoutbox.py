@@ -0,0 +1,127 @@
+import smtplib
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...models import OutgoingEmail
+
+UPDATED_FIELDS = (
+    'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body',
+)
+
+
+class Command(BaseCommand):
+    '''
+    Rows of a batch are locked with SKIP LOCKED, so several workers
+    can drain the outbox at once without sending a mail twice.
+    A mail server that cannot be reached does not use up attempts:
+    the batch is rolled back and retried later. If the connection
+    breaks in the middle of a batch, the mails already sent are
+    committed and the rest of the batch is retried after backoff.
+    '''
+    help = 'Send queued emails from the outbox over one SMTP connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch_size', type=int, default=100)
+        parser.add_argument(
+            '--max_attempts',
+            type=int,
+            default=5,
+            help='Failed attempts before an email is dead-lettered'
+        )
+        parser.add_argument(
+            '--backoff',
+            type=int,
+            default=60,
+            help='Delay before the first retry, seconds; doubles each time'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the outbox'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Polling interval of --loop when the outbox is empty'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = self.drain(options)
+            except (smtplib.SMTPException, OSError) as error:
+                if not options['loop']:
+                    raise CommandError(
+                        'Mail server is unavailable: {!r}'.format(error)
+                    )
+                self.stderr.write(
+                    'Mail server is unavailable: {!r}'.format(error)
+                )
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(
+                    'Sent: {}, failed: {}'.format(sent, failed)
+                ))
+            if not options['loop']:
+                return
+            if not sent and not failed:
+                time.sleep(options['interval'])
+
+    def drain(self, options):
+        '''
+        Send batches until no email is due.
+        '''
+        sent = failed = 0
+        while True:
+            with transaction.atomic():
+                emails = list(OutgoingEmail.objects.due().select_for_update(
+                    skip_locked=True
+                )[:options['batch_size']])
+                if not emails:
+                    return sent, failed
+                batch_sent = self.send_batch(emails, options)
+                OutgoingEmail.objects.bulk_update(emails, UPDATED_FIELDS)
+            sent += batch_sent
+            failed += len(emails) - batch_sent
+
+    def send_batch(self, emails, options):
+        sent = 0
+        with get_connection() as connection:
+            for position, email in enumerate(emails):
+                try:
+                    email.message(connection).send()
+                except (smtplib.SMTPException, OSError) as error:
+                    email.mark_failed(
+                        error, options['max_attempts'], options['backoff']
+                    )
+                    # Соединение могло оборваться вместе с письмом.
+                    # Если переподключиться не удалось, остаток пачки
+                    # откладывается, а исключение не откатывает
+                    # транзакцию с уже отправленными письмами.
+                    error = self.reconnect(connection)
+                    if error is not None:
+                        for rest in emails[position + 1:]:
+                            rest.mark_failed(
+                                error, options['max_attempts'],
+                                options['backoff']
+                            )
+                        break
+                else:
+                    email.mark_sent()
+                    sent += 1
+        return sent
+
+    def reconnect(self, connection):
+        '''
+        Reopen the connection; return the error if that failed.
+        '''
+        try:
+            connection.close()
+            connection.open()
+        except (smtplib.SMTPException, OSError) as error:
+            return error
+        return None
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Лукап icontains в Postgres превращается в
+# UPPER("column"::text) LIKE UPPER('%...%'), поэтому индексы строятся
+# по тому же выражению - тогда планировщик использует их без
+# изменений в фильтрах (CustomFilter.name, SearchFilter во вьюсетах).
+TRIGRAM_INDEXES = (
+    ('reviews_title_name_trgm_idx', 'reviews_title', 'name'),
+    ('reviews_category_name_trgm_idx', 'reviews_category', 'name'),
+    ('reviews_genre_name_trgm_idx', 'reviews_genre', 'name'),
+    ('reviews_user_username_trgm_idx', 'reviews_user', 'username'),
+    ('reviews_user_email_trgm_idx', 'reviews_user', 'email'),
+)
+
+
+def trigram_available(schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(apps, schema_editor):
+    '''
+    Если расширение pg_trgm не установлено на сервере,
+    индексы не создаются: фильтры продолжают работать
+    (последовательным сканированием).
+    '''
+    if not trigram_available(schema_editor):
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS {} ON {} '
+            'USING gin ((UPPER({}::text)) gin_trgm_ops)'.format(
+                index, table, column
+            )
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute('DROP INDEX IF EXISTS {}'.format(index))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
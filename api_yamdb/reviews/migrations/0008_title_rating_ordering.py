@@ -0,0 +1,85 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:58
+
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+# Обратный проход по title_score_avg_idx дает порядок
+# DESC NULLS FIRST, а -rating выводит произведения без оценок
+# в конце - для него отдельный индекс.
+CREATE_SCORE_AVG_DESC_SQL = '''
+CREATE INDEX title_score_avg_desc_idx
+    ON reviews_title (score_avg DESC NULLS LAST, id DESC);
+'''
+
+DROP_SCORE_AVG_DESC_SQL = '''
+DROP INDEX IF EXISTS title_score_avg_desc_idx;
+'''
+
+# Популярность: сумма 2 ** ((pub_date - 2021-01-01) / 7 дней)
+# по отзывам произведения (см. reviews.models.TREND_EPOCH).
+FILL_TREND_SCORE_SQL = '''
+UPDATE reviews_title SET trend_score = coalesce((
+    SELECT sum(power(2, (extract(epoch FROM pub_date) - 1609459200)
+                        / 604800))
+    FROM reviews_review WHERE title_id = reviews_title.id
+), 0);
+'''
+
+
+def run_on_postgres(sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return operation
+
+
+def fill_score_avg(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(score_count__gt=0).update(
+        score_avg=Cast(F('score_sum'), FloatField()) / F('score_count')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_avg',
+            field=models.FloatField(editable=False, null=True, verbose_name='Средняя оценка'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['score_avg', 'id'], name='title_score_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['trend_score', 'id'], name='title_trend_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+        migrations.RunPython(
+            run_on_postgres(CREATE_SCORE_AVG_DESC_SQL),
+            run_on_postgres(DROP_SCORE_AVG_DESC_SQL),
+        ),
+        migrations.RunPython(fill_score_avg, migrations.RunPython.noop),
+        migrations.RunPython(
+            run_on_postgres(FILL_TREND_SCORE_SQL), migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:08
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_genre_ids(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenre = Title.genre.through
+    Title.objects.update(genre_ids=Coalesce(Subquery(
+        TitleGenre.objects.filter(title=OuterRef('pk')).order_by().values(
+            'title'
+        ).annotate(ids=ArrayAgg('genre_id', ordering='genre_id')).values('ids')
+    ), Value([])))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_reviews_comments_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='genre_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, editable=False, size=None, verbose_name='id жанров'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['genre_ids'], name='title_genre_ids_idx'),
+        ),
+        migrations.RunPython(fill_genre_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:22
+
+import math
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Ln
+
+
+def to_log2(apps, schema_editor):
+    '''
+    Сумма весов -> log2 суммы (см. reviews.models.TREND_EPOCH);
+    без отзывов - NULL.
+    '''
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(trend_score__gt=0).update(
+        trend_score=Ln(F('trend_score')) / math.log(2)
+    )
+    Title.objects.filter(trend_score__lte=0).update(trend_score=None)
+
+
+def from_log2(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(trend_score__isnull=False).update(
+        trend_score=2 ** F('trend_score')
+    )
+    Title.objects.filter(trend_score__isnull=True).update(trend_score=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_title_genre_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='trend_score',
+            field=models.FloatField(editable=False, null=True, verbose_name='Популярность'),
+        ),
+        migrations.RunPython(to_log2, from_log2),
+    ]
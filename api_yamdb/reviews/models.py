@@ -1,10 +1,197 @@
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.core.mail import EmailMessage
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import connections, models, transaction
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F, Func,
+                              OuterRef, Q, Subquery, Sum, Value, When)
+from django.db.models.functions import (Abs, Cast, Coalesce, Greatest, Ln,
+                                        NullIf, Power)
+from django.utils import timezone
 
 from .validators import year_validator
 
+SEARCH_CONFIG = 'russian'
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    '''
+    Счетчик отзывов с оценкой score у произведения.
+    '''
+    return 'score_{}'.format(score)
+
+
+SCORE_FIELDS = tuple(score_field(score) for score in SCORES)
+
+# Популярность произведения - сумма весов его отзывов, вес
+# 2 ** trend_exponent(pub_date) удваивается каждые TREND_HALF_LIFE
+# от TREND_EPOCH. Отношение весов двух отзывов от текущего времени
+# не зависит, поэтому сохраненная сумма упорядочивает произведения
+# так же, как затухающая со временем скорость отзывов, и обновляется
+# только при записи отзыва.
+#
+# Сами веса растут экспоненциально и через ~19 лет от TREND_EPOCH
+# вышли бы за пределы float, поэтому хранится log2 суммы, а веса
+# складываются и вычитаются в лог-пространстве (log-sum-exp, см.
+# trend_added и trend_removed). Показатель растет линейно, и
+# переносить эпоху не нужно. У произведения без отзывов
+# популярность не задана (NULL).
+TREND_EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+TREND_HALF_LIFE = timedelta(days=7)
+# В trending попадают произведения, у которых популярность не ниже
+# веса одного отзыва, опубликованного TREND_WINDOW назад.
+TREND_WINDOW = timedelta(days=30)
+# Вклад отзыва, который на столько показателей меньше суммы, не
+# отличим от нуля в float; ограничение не дает POWER уйти в underflow.
+TREND_MAX_GAP = 1000
+# Если вычитаемый вес ближе к сумме, чем на TREND_EPSILON показателя,
+# остаток (меньше ~1e-6 суммы) в float уже не точен: популярность
+# сбрасывается в NULL, а оставшиеся отзывы пересчитываются
+# (см. TitleQuerySet.shift_counters).
+TREND_EPSILON = 1.5e-6
+LOG2_E = 1 / math.log(2)
+
+
+def trend_exponent(moment):
+    '''
+    log2 веса отзыва, опубликованного в момент moment.
+    '''
+    return (moment - TREND_EPOCH) / TREND_HALF_LIFE
+
+
+def sum_trend_exponents(exponents):
+    '''
+    log2 суммы весов 2 ** exponent без вычисления самих весов.
+    '''
+    top = max(exponents)
+    return top + math.log2(sum(
+        2 ** max(exponent - top, -TREND_MAX_GAP) for exponent in exponents
+    ))
+
+
+def trend_added(exponent):
+    '''
+    Популярность после добавления веса 2 ** exponent:
+    log2(2 ** trend_score + 2 ** exponent). exponent - выражение.
+    '''
+    score = F('trend_score')
+    return ExpressionWrapper(Coalesce(
+        Greatest(score, exponent) + Ln(1 + Power(2, Greatest(
+            -Abs(score - exponent), -TREND_MAX_GAP
+        ))) * LOG2_E,
+        exponent
+    ), output_field=models.FloatField())
+
+
+def trend_removed(exponent):
+    '''
+    Популярность после вычитания веса 2 ** exponent:
+    log2(2 ** trend_score - 2 ** exponent); NULL, если это был
+    последний отзыв или остаток не точен (см. TREND_EPSILON).
+    '''
+    score = F('trend_score')
+    return Case(
+        When(trend_score__gt=exponent + TREND_EPSILON, then=(
+            score + Ln(1 - Power(2, Greatest(
+                Value(exponent) - score, -TREND_MAX_GAP
+            ))) * LOG2_E
+        )),
+        default=Value(None),
+        output_field=models.FloatField(),
+    )
+
+
+def newest_trend(title):
+    '''
+    Показатель веса самого нового отзыва произведения
+    (по индексу review_title_pub_date_idx).
+    '''
+    return TrendExponent(Subquery(
+        Review.objects.filter(title=title).order_by(
+            '-pub_date'
+        ).values('pub_date')[:1]
+    ))
+
+
+class TrendExponent(Func):
+    '''
+    Показатель веса отзыва (trend_exponent) по дате публикации,
+    вычисленный в БД.
+    '''
+    template = (
+        '((EXTRACT(EPOCH FROM %(expressions)s) - %(epoch)s) '
+        '/ %(half_life)s)'
+    )
+    output_field = models.FloatField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(
+            expression,
+            epoch=TREND_EPOCH.timestamp(),
+            half_life=TREND_HALF_LIFE.total_seconds(),
+            **extra
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template=(
+            "((CAST(STRFTIME('%%%%s', %(expressions)s) AS REAL) "
+            "- %(epoch)s) / %(half_life)s)"
+        ), **extra_context)
+
+
+def related_count(model, field):
+    '''
+    Число объектов model, которые ссылаются полем field
+    на строку внешнего запроса.
+    '''
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def title_genre_ids():
+    '''
+    Отсортированные id жанров произведения из таблицы связей.
+    '''
+    return Coalesce(Subquery(
+        Title.genre.through.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title').annotate(
+            ids=ArrayAgg('genre_id', ordering='genre_id')
+        ).values('ids')
+    ), Value([]))
+
+
+def score_average(score_sum, score_count):
+    return ExpressionWrapper(
+        Cast(score_sum, models.FloatField()) / NullIf(score_count, Value(0)),
+        output_field=models.FloatField()
+    )
+
+
+def with_score_average(values):
+    '''
+    Если UPDATE меняет сумму или количество оценок, средняя
+    оценка пересчитывается в нем же из новых значений.
+    '''
+    if {'score_sum', 'score_count'}.isdisjoint(values):
+        return values
+    return dict(values, score_avg=score_average(
+        values.get('score_sum', F('score_sum')),
+        values.get('score_count', F('score_count')),
+    ))
+
 
 class UserRoles:
     ADMIN = 'admin'
@@ -52,6 +239,27 @@ class User(AbstractUser):
         return self.role == UserRoles.MODERATOR
 
 
+class TokenUser(User):
+    '''
+    Пользователь, собранный из полей JWT без запроса к БД
+    (см. StatelessJWTAuthentication): остальные поля пустые,
+    поэтому сохранение затерло бы настоящую строку.
+    '''
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError(
+            'Пользователь из токена не сохраняется: загрузите его из БД.'
+        )
+
+    def delete(self, *args, **kwargs):
+        raise NotImplementedError(
+            'Пользователь из токена не удаляется: загрузите его из БД.'
+        )
+
+
 class Category(models.Model):
     """Категории произведений."""
     name = models.CharField(
@@ -82,6 +290,157 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def with_relations(self):
+        '''
+        Категория подтягивается JOIN'ом, жанры - одним
+        дополнительным запросом на всю выборку.
+        '''
+        return self.select_related('category').prefetch_related(
+            'genre'
+        ).defer('search_vector')
+
+    def search(self, text):
+        '''
+        Полнотекстовый поиск по названию и описанию с сортировкой
+        по релевантности (название весит больше описания).
+
+        В Postgres используется поле search_vector с GIN-индексом,
+        которое поддерживает триггер (см. миграцию 0004).
+        В остальных БД (SQLite в тестах) - поиск по подстроке.
+        '''
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                Q(name__icontains=text) | Q(description__icontains=text)
+            )
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', 'pk')
+
+    def shift_counters(self, sign=1, **counters):
+        '''
+        Атомарно сдвигает сохраненные счетчики произведений
+        на переданные значения (одним UPDATE через F-выражения).
+        trend_score - показатель веса отзыва (см. TREND_EPOCH).
+        '''
+        trend = counters.pop('trend_score', None)
+        counters = {
+            field: F(field) + sign * value
+            for field, value in counters.items() if value
+        }
+        if trend is not None:
+            counters['trend_score'] = (
+                trend_added(Value(trend)) if sign > 0
+                else trend_removed(trend)
+            )
+        if counters:
+            self.update(**with_score_average(counters))
+        if trend is not None and sign < 0:
+            self.filter(
+                trend_score__isnull=True, reviews_count__gt=0
+            ).recalculate_scores()
+
+    def shift_counters_by_title(self, counters):
+        '''
+        То же для нескольких произведений сразу: сдвиги
+        {title_id: {поле: значение}} применяются одним UPDATE с CASE.
+        trend_score - показатель суммы весов (см. sum_trend_exponents).
+        '''
+        fields = {
+            field
+            for title_counters in counters.values()
+            for field, value in title_counters.items()
+            if value and field != 'trend_score'
+        }
+        values = {
+            field: F(field) + Case(
+                *(When(pk=title_id, then=Value(title_counters[field]))
+                  for title_id, title_counters in counters.items()
+                  if title_counters.get(field)),
+                default=Value(0),
+                output_field=self.model._meta.get_field(field),
+            )
+            for field in fields
+        }
+        trends = {
+            title_id: title_counters['trend_score']
+            for title_id, title_counters in counters.items()
+            if title_counters.get('trend_score') is not None
+        }
+        if trends:
+            values['trend_score'] = trend_added(Case(
+                *(When(pk=title_id, then=Value(trend))
+                  for title_id, trend in trends.items()),
+                output_field=models.FloatField(),
+            ))
+        if values:
+            self.filter(pk__in=counters).update(**with_score_average(values))
+
+    def recalculate_scores(self):
+        '''
+        Пересчитывает число отзывов, сумму, количество,
+        распределение оценок, среднюю оценку и популярность
+        по таблице отзывов с нуля.
+        '''
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        scored = reviews.filter(score__isnull=False)
+
+        def subquery(aggregate, reviews=scored):
+            return Subquery(reviews.annotate(total=aggregate).values('total'))
+
+        def total(aggregate, reviews=scored, default=0):
+            return Coalesce(subquery(aggregate, reviews), default)
+        return self.update(
+            reviews_count=related_count(Review, 'title'),
+            score_sum=total(Sum('score')),
+            score_count=total(Count('pk')),
+            score_avg=subquery(Avg('score', output_field=models.FloatField())),
+            # log-sum-exp: веса берутся относительно самого нового
+            # отзыва, поэтому сумма не переполняется.
+            trend_score=newest_trend(OuterRef('pk')) + Ln(subquery(Sum(
+                Power(2, Greatest(
+                    TrendExponent('pub_date') - newest_trend(
+                        OuterRef('title')
+                    ),
+                    -TREND_MAX_GAP
+                ))
+            ), reviews)) * LOG2_E,
+            **{
+                score_field(score): total(Count('pk', filter=Q(score=score)))
+                for score in SCORES
+            }
+        )
+
+    def refresh_genre_ids(self):
+        '''
+        Пересчитывает genre_ids по таблице связей с жанрами.
+        '''
+        return self.update(genre_ids=title_genre_ids())
+
+    def top(self):
+        '''
+        Произведения с оценками от лучших к худшим. Порядок
+        совпадает с индексом по средней оценке (см. миграцию 0008).
+        '''
+        return self.filter(score_avg__isnull=False).order_by(
+            F('score_avg').desc(nulls_last=True), '-pk'
+        )
+
+    def trending(self, now=None):
+        '''
+        Произведения, о которых пишут сейчас: по убыванию
+        популярности (см. TREND_EPOCH), не старше TREND_WINDOW.
+        '''
+        threshold = trend_exponent((now or timezone.now()) - TREND_WINDOW)
+        return self.filter(trend_score__gte=threshold).order_by(
+            '-trend_score', '-pk'
+        )
+
+
 class Title(models.Model):
     """Произведения, к которым пишут отзывы."""
     name = models.CharField(
@@ -103,22 +462,170 @@ class Title(models.Model):
                                             blank=True,
                                             verbose_name='Год издания')
     description = models.TextField(verbose_name='Описание произведения')
+    reviews_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Сумма оценок'
+    )
+    score_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество оценок'
+    )
+    score_avg = models.FloatField(
+        null=True, editable=False,
+        verbose_name='Средняя оценка'
+    )
+    trend_score = models.FloatField(
+        null=True, editable=False,
+        verbose_name='Популярность'
+    )
+    search_vector = SearchVectorField(
+        null=True, editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    # Копия жанров из таблицы связей (отсортированные id) для
+    # фильтров по нескольким жанрам без JOIN и DISTINCT (см. GIN-индекс
+    # и GenreSetFilter). Обновляется сигналом m2m_changed.
+    genre_ids = ArrayField(
+        models.IntegerField(), default=list, editable=False,
+        verbose_name='id жанров'
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Ключи сортировки ordering (см. TitleOrderingFilter) с id
+        # для однозначного порядка; обратные направления - обратным
+        # проходом, кроме -rating (см. миграцию 0008).
+        indexes = [
+            models.Index(
+                fields=['score_avg', 'id'], name='title_score_avg_idx'
+            ),
+            models.Index(
+                fields=['trend_score', 'id'], name='title_trend_score_idx'
+            ),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            GinIndex(fields=['genre_ids'], name='title_genre_ids_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     @property
     def rating(self):
-        rating = self.reviews.aggregate(Avg('score')).get('score__avg')
-        if rating:
-            return round(rating)
+        '''
+        Средняя оценка считается по сохраненным сумме и количеству
+        оценок, поэтому чтение рейтинга не обращается к отзывам.
+        '''
+        if self.score_count:
+            return round(self.score_sum / self.score_count)
+
+    @property
+    def score_mean(self):
+        if self.score_count:
+            return round(self.score_sum / self.score_count, 2)
+
+    @property
+    def score_distribution(self):
+        '''
+        {оценка: число отзывов} по сохраненным счетчикам.
+        '''
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
+    @property
+    def score_median(self):
+        '''
+        Медиана оценок по распределению: для четного числа
+        оценок - среднее двух средних значений.
+        '''
+        if not self.score_count:
+            return None
+        middle = ((self.score_count - 1) // 2, self.score_count // 2)
+        values, seen = [], 0
+        for score, count in self.score_distribution.items():
+            seen += count
+            values.extend(
+                score for position in middle
+                if seen - count <= position < seen
+            )
+        return sum(values) / 2
+
+
+for score in SCORES:
+    Title.add_to_class(score_field(score), models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество оценок {}'.format(score)
+    ))
+
+
+class AuthoredQuerySet(models.QuerySet):
+
+    def with_author(self):
+        '''
+        Автор подтягивается JOIN'ом; из его полей
+        для вывода нужен только username.
+        '''
+        return self.select_related('author').only(
+            *(field.name for field in self.model._meta.concrete_fields),
+            'author__username'
+        )
+
+
+class ReviewQuerySet(AuthoredQuerySet):
+    '''
+    Массовые операции с отзывами обходят сигналы,
+    поэтому агрегаты произведений обновляются здесь.
+    '''
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            counters = defaultdict(Counter)
+            trends = defaultdict(list)
+            for review in objs:
+                review_counters = Review.title_counters(
+                    review.score, review.pub_date
+                )
+                trends[review.title_id].append(
+                    review_counters.pop('trend_score')
+                )
+                counters[review.title_id].update(review_counters)
+                review.remember_state()
+            for title_id, exponents in trends.items():
+                counters[title_id]['trend_score'] = sum_trend_exponents(
+                    exponents
+                )
+            Title.objects.shift_counters_by_title(counters)
+        return objs
+
+    def update(self, **kwargs):
+        if not Review.COUNTED_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            title_ids = set(self.values_list('title_id', flat=True))
+            new_title = kwargs.get('title', kwargs.get('title_id'))
+            if new_title is not None:
+                title_ids.add(getattr(new_title, 'pk', new_title))
+            updated = super().update(**kwargs)
+            Title.objects.filter(pk__in=title_ids).recalculate_scores()
+        return updated  # noqa: R504
+
+    def recalculate_comments(self):
+        '''
+        Пересчитывает число комментариев отзывов с нуля.
+        '''
+        return self.update(comments_count=related_count(Comment, 'review'))
 
 
 class Review(models.Model):
+    COUNTED_FIELDS = {'title', 'title_id', 'score', 'pub_date'}
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -143,11 +650,23 @@ class Review(models.Model):
         db_index=True,
         verbose_name='Дата публикации'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         ordering = ('pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -158,6 +677,51 @@ class Review(models.Model):
     def __str__(self):
         return self.title.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_state()
+        return instance
+
+    def remember_state(self):
+        '''
+        Запоминает сохраненные в БД значения, от которых
+        зависят агрегаты произведения. Если поля отложены
+        (.only()/.defer()), состояние считается неизвестным.
+        '''
+        if {'title_id', 'score'}.issubset(self.__dict__):
+            self._saved_state = (self.title_id, self.score)
+        else:
+            self._saved_state = None
+
+    @staticmethod
+    def title_counters(score, pub_date):
+        '''
+        Вклад отзыва с данной оценкой и датой в агрегаты произведения;
+        для trend_score - показатель веса (см. TitleQuerySet.shift_counters).
+        '''
+        return {
+            'reviews_count': 1, 'trend_score': trend_exponent(pub_date),
+            **Review.score_counters(score)
+        }
+
+    @staticmethod
+    def score_counters(score):
+        '''
+        Вклад оценки score в счетчики оценок произведения.
+        '''
+        if score is None:
+            return {}
+        return {'score_sum': score, 'score_count': 1, score_field(score): 1}
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Комментарий')
@@ -179,10 +743,123 @@ class Comment(models.Model):
         verbose_name='Отзыв'
     )
 
+    objects = AuthoredQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        '''
+        Число комментариев отзыва обновляет сигнал
+        в той же транзакции (см. reviews/signals.py).
+        '''
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+
+class EmailStatus:
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+
+    def due(self):
+        '''
+        Письма, которые пора (пере)отправить, в порядке очереди.
+        '''
+        return self.filter(
+            status=EmailStatus.PENDING, next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at', 'id')
+
+
+class OutgoingEmail(models.Model):
+    '''
+    Очередь исходящих писем (outbox).
+
+    Письмо записывается в транзакции запроса, а отправляет его
+    команда sendoutbox. Текст отправленного письма стирается,
+    чтобы не хранить коды подтверждения дольше необходимого.
+    '''
+    STATUSES = (
+        (EmailStatus.PENDING, 'ожидает отправки'),
+        (EmailStatus.SENT, 'отправлено'),
+        (EmailStatus.DEAD, 'не доставлено'),
+    )
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(blank=True, verbose_name='Текст')
+    from_email = models.CharField(max_length=255, verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=EmailStatus.PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Отправлено'
+    )
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outgoing_email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return '{} -> {}'.format(self.subject, self.recipient)
+
+    def message(self, connection=None):
+        return EmailMessage(
+            self.subject, self.body, self.from_email, [self.recipient],
+            connection=connection
+        )
+
+    def mark_sent(self):
+        self.status = EmailStatus.SENT
+        self.sent_at = timezone.now()
+        self.body = ''
+        self.last_error = ''
+
+    def mark_failed(self, error, max_attempts, backoff):
+        '''
+        Экспоненциальная задержка перед повтором; после max_attempts
+        попыток письмо переходит в статус "не доставлено".
+        '''
+        self.attempts += 1
+        self.last_error = repr(error)
+        if self.attempts >= max_attempts:
+            self.status = EmailStatus.DEAD
+            return
+        self.next_attempt_at = timezone.now() + timedelta(
+            seconds=backoff * 2 ** (self.attempts - 1)
+        )
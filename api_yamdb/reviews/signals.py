@@ -0,0 +1,104 @@
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Comment, Genre, Review, Title
+
+# Массовые записи (COPY, bulk_create, update) не отправляют сигналы
+# моделей. Команды загрузки и пересчета по завершении отправляют
+# этот сигнал со списком измененных моделей.
+bulk_changed = Signal(providing_args=['models'])
+
+
+@receiver(post_save, sender=Review)
+def update_title_scores_on_save(sender, instance, created, **kwargs):
+    '''
+    Переносит изменение оценки отзыва в агрегаты произведения.
+    Отзыв сохраняется в транзакции (см. Review.save),
+    поэтому счетчики не расходятся с таблицей отзывов.
+    '''
+    state = getattr(instance, '_saved_state', None)
+    titles = Title.objects.filter(pk=instance.title_id)
+    if not created and state is None:
+        # Прежние значения неизвестны (поля были отложены),
+        # поэтому пересчитываем агрегаты произведения целиком.
+        titles.recalculate_scores()
+    elif created or state[0] != instance.title_id:
+        if not created:
+            title_id, score = state
+            Title.objects.filter(pk=title_id).shift_counters(
+                sign=-1, **Review.title_counters(score, instance.pub_date)
+            )
+        titles.shift_counters(
+            **Review.title_counters(instance.score, instance.pub_date)
+        )
+    elif state[1] != instance.score:
+        # Сменилась только оценка: число отзывов и популярность
+        # произведения те же.
+        counters = Counter(Review.score_counters(instance.score))
+        counters.subtract(Review.score_counters(state[1]))
+        titles.shift_counters(**counters)
+    instance.remember_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_title_scores_on_delete(sender, instance, **kwargs):
+    '''
+    Срабатывает и при каскадном удалении (произведения или автора):
+    Collector отправляет post_delete для каждого отзыва.
+    '''
+    state = getattr(instance, '_saved_state', None)
+    if state is None:
+        state = (instance.title_id, instance.score)
+    title_id, score = state
+    Title.objects.filter(pk=title_id).shift_counters(
+        sign=-1, **Review.title_counters(score, instance.pub_date)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, **kwargs):
+    if created:
+        Review.objects.filter(pk=instance.review_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, **kwargs):
+    '''
+    Срабатывает и при каскадном удалении (отзыва, произведения
+    или автора).
+    '''
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_count=F('comments_count') - 1
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_genre_ids_on_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    '''
+    Изменения с обеих сторон связи: title.genre и genre.title_set.
+    '''
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        titles = Title.objects.filter(pk=instance.pk)
+    elif pk_set is not None:
+        titles = Title.objects.filter(pk__in=pk_set)
+    else:
+        titles = Title.objects.filter(genre_ids__contains=[instance.pk])
+    titles.refresh_genre_ids()
+
+
+@receiver(post_delete, sender=Genre)
+def refresh_genre_ids_on_delete(sender, instance, **kwargs):
+    '''
+    Связи удаленного жанра удаляются без m2m_changed.
+    '''
+    Title.objects.filter(
+        genre_ids__contains=[instance.pk]
+    ).refresh_genre_ids()
@@ -1,9 +1,31 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from django.db import DatabaseError, connection
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+def database_available():
+    try:
+        connection.ensure_connection()
+        return True
+    except DatabaseError:
+        return False
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def database(request, django_db_blocker):
+    with django_db_blocker.unblock():
+        available = database_available()
+    if not available:
+        pytest.skip('Нужна база данных')
+    request.getfixturevalue('db')
@@ -0,0 +1,105 @@
+import pytest
+from api.cache import get_generations
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+DUPLICATE = 'Вы уже оставили отзыв на это произведение.'
+
+
+class TestBatchCreate:
+
+    @pytest.fixture(autouse=True)
+    def commit_callbacks(self, django_capture_on_commit_callbacks):
+        self.capture_callbacks = django_capture_on_commit_callbacks
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        ))
+        Category.objects.create(name='Книги', slug='books')
+        Genre.objects.create(name='Драма', slug='drama')
+        self.titles = [
+            Title.objects.create(name=str(i), year=2000, description='')
+            for i in range(2)
+        ]
+
+    def post(self, url, data):
+        with self.capture_callbacks(execute=True):
+            return self.client.post(url, data, format='json')
+
+    def title(self, name, **fields):
+        return dict({'name': name, 'year': 2000, 'description': 'Описание',
+                     'category': 'books', 'genre': ['drama']}, **fields)
+
+    def test_titles(self, database):
+        self.setup_data()
+        generation, = get_generations(('title',))
+        response = self.post('/api/v1/titles/batch/', [
+            self.title('Первая'), self.title('Вторая')
+        ])
+        assert response.status_code == 201 and [
+            title['name'] for title in response.json()
+        ] == ['Первая', 'Вторая'], 'Проверьте создание пачки произведений'
+        assert Title.objects.get(name='Первая').genre_ids == [
+            Genre.objects.get().pk
+        ], 'Проверьте жанры созданных произведений'
+        assert get_generations(('title',)) != (generation,), (
+            'Проверьте, что пачка сбрасывает кэш произведений'
+        )
+
+    def test_item_errors(self, database):
+        self.setup_data()
+        response = self.post('/api/v1/titles/batch/', [
+            self.title('Первая'), self.title('Вторая', year='год')
+        ])
+        errors = response.json()
+        assert response.status_code == 400 and errors[0] == {} and (
+            'year' in errors[1]
+        ), 'Проверьте, что ошибки возвращаются на позиции объекта'
+        assert not Title.objects.filter(name='Первая').exists(), (
+            'Проверьте, что пачка с ошибками не создает объекты'
+        )
+
+    def test_reviews(self, database):
+        self.setup_data()
+        title_id = self.titles[0].pk
+        generation, = get_generations(('review:{}'.format(title_id),))
+        response = self.post('/api/v1/reviews/batch/', [
+            {'title': title_id, 'text': 'Отзыв', 'score': 5}
+        ])
+        assert response.status_code == 201 and Review.objects.filter(
+            title_id=title_id
+        ).exists(), 'Проверьте создание пачки отзывов'
+        assert get_generations(('review:{}'.format(title_id),)) != (
+            generation,
+        ), 'Проверьте, что пачка сбрасывает версию отзывов произведения'
+        response = self.post('/api/v1/reviews/batch/', [
+            {'title': self.titles[1].pk, 'text': 'Отзыв', 'score': 5},
+            {'title': self.titles[1].pk, 'text': 'Еще', 'score': 6},
+            {'title': title_id, 'text': 'Повтор', 'score': 6},
+        ])
+        errors = response.json()
+        assert response.status_code == 400 and errors[0] == {} and (
+            errors[1] == errors[2] == {'title': [DUPLICATE]}
+        ), 'Проверьте повторы внутри пачки и с существующими отзывами'
+
+    def test_malformed_bodies(self, database, settings):
+        self.setup_data()
+        response = self.post('/api/v1/reviews/batch/', {'title': 1})
+        assert response.status_code == 400 and 'non_field_errors' in (
+            response.json()
+        ), 'Проверьте ответ на тело запроса, не являющееся списком'
+        response = self.post('/api/v1/reviews/batch/', [1, 1])
+        assert response.status_code == 400 and DUPLICATE not in str(
+            response.json()
+        ), 'Проверьте, что неразобранные объекты не проверяются на повторы'
+        settings.BATCH_MAX_SIZE = 1
+        response = self.post('/api/v1/titles/batch/', [
+            self.title('Первая'), self.title('Вторая')
+        ])
+        assert response.status_code == 400, (
+            'Проверьте ограничение BATCH_MAX_SIZE'
+        )
@@ -0,0 +1,43 @@
+from io import StringIO
+
+from api.cache import BULK_GENERATION, get_generations
+from django.core.cache import cache
+from django.core.management import call_command
+from reviews.management.commands._common import LOCAL_CACHE_WARNING
+from reviews.models import Title
+
+SCOPES = ('title', 'review', BULK_GENERATION)
+
+
+class TestBulkInvalidation:
+
+    def setup_method(self):
+        cache.clear()
+
+    def test_commands_bump_generations(
+        self, database, django_capture_on_commit_callbacks
+    ):
+        Title.objects.create(name='Книга', year=2000, description='')
+        for command, options in (
+            ('rebuildratings', {}),
+            ('reconcilecounters', {}),
+            ('generatedata', {'users': 3, 'categories': 1, 'genres': 2,
+                              'titles': 3, 'reviews': 5, 'comments': 5}),
+        ):
+            generations = get_generations(SCOPES)
+            stderr = StringIO()
+            with django_capture_on_commit_callbacks(execute=True):
+                call_command(command, stdout=StringIO(), stderr=stderr,
+                             **options)
+            title, _, bulk = (
+                new != old
+                for new, old in zip(get_generations(SCOPES), generations)
+            )
+            assert title and bulk, (
+                'Проверьте, что {} сбрасывает кэш произведений и '
+                'вложенных списков'.format(command)
+            )
+            assert LOCAL_CACHE_WARNING in stderr.getvalue(), (
+                'Проверьте, что {} предупреждает о кэше, локальном '
+                'для процесса'.format(command)
+            )
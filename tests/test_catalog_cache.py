@@ -0,0 +1,62 @@
+from api.cache import bump_generation, get_generations
+from django.core.cache import cache
+from reviews.models import Review, Title, User
+
+
+class TestCatalogCacheGenerations:
+
+    def setup_method(self):
+        cache.clear()
+
+    def test_generations_are_stable_between_reads(self):
+        assert get_generations(('title', 'genre')) == get_generations(
+            ('title', 'genre')
+        ), 'Проверьте, что поколения не меняются без записи в модели'
+
+    def test_bump_changes_only_its_generation(self):
+        title, genre = get_generations(('title', 'genre'))
+        bump_generation('title')
+        new_title, new_genre = get_generations(('title', 'genre'))
+        assert new_title != title, (
+            'Проверьте, что запись в модель меняет ее поколение'
+        )
+        assert new_genre == genre, (
+            'Проверьте, что запись в модель не меняет чужие поколения'
+        )
+
+    def test_bump_after_eviction_does_not_reuse_old_generation(self):
+        old, = get_generations(('title',))
+        cache.clear()
+        bump_generation('title')
+        new, = get_generations(('title',))
+        assert new != old, (
+            'Проверьте, что после вытеснения ключа поколение не повторяется'
+        )
+
+
+class TestGenerationsAfterCommit:
+
+    def setup_method(self):
+        cache.clear()
+
+    def test_bump_waits_for_commit(
+        self, database, django_capture_on_commit_callbacks
+    ):
+        title = Title.objects.create(name='Книга', year=2000, description='')
+        scopes = ('review', 'review:{}'.format(title.pk))
+        generations = get_generations(scopes)
+        with django_capture_on_commit_callbacks() as callbacks:
+            Review.objects.create(
+                author=User.objects.create(username='u', email='u@yamdb.fake'),
+                title=title, text='Отзыв', score=5
+            )
+            assert get_generations(scopes) == generations, (
+                'Проверьте, что поколения не меняются до фиксации '
+                'транзакции: иначе в кэш попадут старые данные'
+            )
+        for callback in callbacks:
+            callback()
+        assert all(
+            new != old
+            for new, old in zip(get_generations(scopes), generations)
+        ), 'Проверьте, что поколения меняются после фиксации транзакции'
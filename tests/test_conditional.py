@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Title, User
+
+
+class TestConditionalGet:
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        self.title = Title.objects.create(name='Книга', year=2000,
+                                          description='')
+        self.url = '/api/v1/titles/{}/'.format(self.title.pk)
+
+    def test_not_modified(self, database, django_assert_num_queries):
+        self.setup_data()
+        response = self.client.get(self.url)
+        assert response.status_code == 200 and response['ETag'], (
+            'Проверьте, что ответ содержит ETag'
+        )
+        with django_assert_num_queries(0):
+            not_modified = self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        assert not_modified.status_code == 304, (
+            'Проверьте ответ 304 на совпадающий If-None-Match'
+        )
+        assert not_modified['ETag'] == response['ETag']
+        with django_assert_num_queries(0):
+            not_modified = self.client.get(
+                self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        assert not_modified.status_code == 304, (
+            'Проверьте ответ 304 на If-Modified-Since'
+        )
+
+    def test_write_changes_etag(
+        self, database, django_capture_on_commit_callbacks
+    ):
+        self.setup_data()
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_authenticate(User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        ))
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.patch(self.url, {'name': 'Новая'})
+        assert response.status_code == 200
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and (
+            response.json()['name'] == 'Новая'
+        ), 'Проверьте, что после записи ETag меняется'
+
+    def test_etag_depends_on_format(self, database):
+        self.setup_data()
+        json_etag = self.client.get(self.url)['ETag']
+        response = self.client.get(
+            self.url, HTTP_ACCEPT='application/msgpack',
+            HTTP_IF_NONE_MATCH=json_etag
+        )
+        assert response.status_code == 200 and (
+            response['ETag'] != json_etag
+        ), 'Проверьте, что ETag различается для разных форматов ответа'
+
+    def test_deleted_title_reviews(
+        self, database, django_capture_on_commit_callbacks
+    ):
+        self.setup_data()
+        url = '{}reviews/'.format(self.url)
+        etag = self.client.get(url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            self.title.delete()
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+            404
+        ), 'Проверьте, что отзывы удаленного произведения не дают 304'
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title, User
+
+
+class TestCounts:
+
+    def setup_data(self):
+        self.users = [
+            User.objects.create(username='u{}'.format(i),
+                                email='u{}@yamdb.fake'.format(i))
+            for i in range(2)
+        ]
+        self.title = Title.objects.create(name='Книга', year=2000,
+                                          description='')
+        self.reviews = [
+            Review.objects.create(author=user, title=self.title,
+                                  text='Отзыв')
+            for user in self.users
+        ]
+        for user in self.users:
+            Comment.objects.create(author=user, review=self.reviews[1],
+                                   text='Комментарий')
+
+    def counts(self):
+        self.title.refresh_from_db()
+        self.reviews[1].refresh_from_db()
+        return self.title.reviews_count, self.reviews[1].comments_count
+
+    def test_cascade_delete(self, database):
+        self.setup_data()
+        assert self.counts() == (2, 2), 'Проверьте счетчики при создании'
+        self.users[0].delete()
+        assert self.counts() == (1, 1), (
+            'Проверьте счетчики при каскадном удалении автора'
+        )
+
+    def test_reconcile(self, database):
+        self.setup_data()
+        Title.objects.update(reviews_count=10)
+        Review.objects.update(comments_count=0)
+        call_command('reconcilecounters', batch_size=1, stdout=StringIO())
+        assert self.counts() == (2, 2), (
+            'Проверьте, что reconcilecounters исправляет счетчики'
+        )
+
+
+class TestCommentsCountInReviewList:
+
+    def setup_data(self):
+        cache.clear()
+        self.user = User.objects.create(username='u', email='u@yamdb.fake')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.title = Title.objects.create(name='Книга', year=2000,
+                                          description='')
+        self.review = Review.objects.create(author=self.user,
+                                            title=self.title, text='Отзыв')
+        self.url = '/api/v1/titles/{}/reviews/'.format(self.title.pk)
+
+    def comments_count(self, etag):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что запись комментария меняет ETag списка отзывов'
+        )
+        return response['ETag'], response.json()['results'][0][
+            'comments_count'
+        ]
+
+    def test_comment_write_changes_etag(
+        self, database, django_capture_on_commit_callbacks
+    ):
+        self.setup_data()
+        etag = self.client.get(self.url)['ETag']
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(
+                '/api/v1/titles/{}/reviews/{}/comments/'.format(
+                    self.title.pk, self.review.pk
+                ),
+                {'text': 'Комментарий'}
+            )
+        assert response.status_code == 201
+        etag, count = self.comments_count(etag)
+        assert count == 1, 'Проверьте comments_count после комментария'
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.get().delete()
+        _, count = self.comments_count(etag)
+        assert count == 0, 'Проверьте comments_count после удаления'
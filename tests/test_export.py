@@ -0,0 +1,62 @@
+import csv
+import gzip
+import io
+import json
+
+from api.export import export_stream
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class TestExport:
+
+    def setup_data(self):
+        category = Category.objects.create(name='Книга', slug='book')
+        genre = Genre.objects.create(name='Роман', slug='roman')
+        user = User.objects.create(username='reader', email='r@yamdb.fake')
+        for number in range(5):
+            title = Title.objects.create(
+                name='Книга {}'.format(number), year=2000, description='',
+                category=category
+            )
+            title.genre.set([genre])
+            review = Review.objects.create(
+                author=user, title=title, score=number + 1, text='Отзыв'
+            )
+            Comment.objects.create(author=user, review=review, text='Да')
+
+    def test_ndjson_has_every_object(self, database):
+        self.setup_data()
+        for name, model in (('titles', Title), ('reviews', Review),
+                            ('comments', Comment)):
+            lines = b''.join(
+                export_stream(name, 'ndjson', chunk_size=2)
+            ).splitlines()
+            assert [json.loads(line)['id'] for line in lines] == list(
+                model.objects.order_by('pk').values_list('pk', flat=True)
+            ), 'Проверьте, что выгрузка {} содержит все объекты'.format(name)
+
+    def test_gzip_csv(self, database):
+        self.setup_data()
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b''.join(
+            export_stream('titles', 'csv', compress=True, chunk_size=2)
+        )).decode())))
+        assert rows[0] == ['id', 'name', 'category', 'genre', 'year',
+                           'description', 'rating', 'reviews_count'], (
+            'Проверьте заголовок CSV'
+        )
+        assert len(rows) == 6 and json.loads(rows[1][3]) == [
+            {'name': 'Роман', 'slug': 'roman'}
+        ], 'Проверьте, что жанры записываются в ячейку как JSON'
+
+    def test_invalid_since(self, database):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        ))
+        for since in ('вчера', '2021-02-30', '2021-13-01T00:00:00'):
+            response = client.get('/api/v1/export/reviews.ndjson',
+                                  {'since': since})
+            assert response.status_code == 400 and 'since' in (
+                response.json()
+            ), 'Проверьте ответ на неверную дату since: {}'.format(since)
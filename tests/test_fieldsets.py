@@ -0,0 +1,73 @@
+from api.fieldsets import fieldset_queryset
+from api.serializers import TitleReadSerializer
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+class TestSparseFieldsets:
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name='Книга', slug='book')
+        genre = Genre.objects.create(name='Роман', slug='roman')
+        for number in range(3):
+            title = Title.objects.create(
+                name='Книга {}'.format(number), year=2000,
+                description='Описание', category=category
+            )
+            title.genre.set([genre])
+
+    def get_titles(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/titles/', params)
+        return response, [query['sql'] for query in queries]
+
+    def test_fields_and_omit(self, database):
+        self.setup_data()
+        for params, expected in (
+            ({'fields': 'id,name'}, ['id', 'name']),
+            ({'omit': 'genre,description'},
+             ['id', 'name', 'category', 'year', 'rating', 'reviews_count']),
+            ({'fields': 'id,name,year', 'omit': 'year'}, ['id', 'name']),
+        ):
+            response, _ = self.get_titles(params)
+            assert response.status_code == 200 and all(
+                list(title) == expected for title in response.json()['results']
+            ), 'Проверьте набор полей ответа для {}'.format(params)
+
+    def test_unknown_fields(self, database):
+        self.setup_data()
+        for params in ({'fields': 'id,unknown'}, {'omit': 'unknown'}):
+            response, _ = self.get_titles(params)
+            assert response.status_code == 400 and 'unknown' in (
+                response.json()['fields']
+            ), 'Проверьте ответ 400 на неизвестные поля {}'.format(params)
+
+    def test_query_is_narrowed(self, database):
+        self.setup_data()
+        _, queries = self.get_titles({'fields': 'id,name'})
+        assert len(queries) == 2 and not any(
+            'description' in sql or 'reviews_category' in sql
+            or 'reviews_genre' in sql for sql in queries
+        ), 'Проверьте, что запрос выбирает только поля из fields'
+
+    def test_fieldset_queryset(self, database):
+        self.setup_data()
+        serializer = TitleReadSerializer(
+            context={'fieldset': {'id', 'name'}}
+        )
+        queryset = fieldset_queryset(Title.objects.with_relations(),
+                                     serializer)
+        with CaptureQueriesContext(connection) as queries:
+            titles = list(queryset)
+        sql = queries[0]['sql']
+        assert len(queries) == 1 and 'JOIN' not in sql and (
+            'description' not in sql
+        ), 'Проверьте, что выброшенные поля не загружаются и не джойнятся'
+        assert titles[0].get_deferred_fields() >= {'description', 'year'}, (
+            'Проверьте, что fieldset_queryset применяет only()'
+        )
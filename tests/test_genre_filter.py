@@ -0,0 +1,45 @@
+from rest_framework.test import APIClient
+from reviews.models import Genre, Title
+
+
+class TestGenreFilter:
+
+    def setup_data(self):
+        self.genres = [
+            Genre.objects.create(name=slug, slug=slug)
+            for slug in ('drama', 'comedy', 'horror')
+        ]
+        self.titles = [
+            Title.objects.create(name=str(i), year=2000, description='')
+            for i in range(3)
+        ]
+        self.titles[0].genre.set(self.genres[:2])
+        self.titles[1].genre.add(self.genres[0])
+        self.genres[2].title_set.add(self.titles[2])
+
+    def names(self, query):
+        response = APIClient().get('/api/v1/titles/?' + query)
+        assert response.status_code == 200, (
+            'Проверьте фильтр по жанрам: {}'.format(query)
+        )
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_all_and_any(self, database):
+        self.setup_data()
+        assert self.names('genre_all=drama,comedy') == ['0'], (
+            'Проверьте, что genre_all возвращает произведения со всеми '
+            'жанрами'
+        )
+        assert self.names('genre_any=comedy&genre_any=horror') == [
+            '0', '2'
+        ], 'Проверьте, что genre_any возвращает произведения с любым жанром'
+
+    def test_genre_ids_sync(self, database):
+        self.setup_data()
+        self.genres[0].delete()
+        self.genres[2].title_set.clear()
+        assert [
+            title.genre_ids for title in Title.objects.order_by('pk')
+        ] == [[self.genres[1].pk], [], []], (
+            'Проверьте, что genre_ids обновляется при изменении жанров'
+        )
@@ -0,0 +1,47 @@
+from io import StringIO
+
+from django.core.management import call_command
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+MODELS = (Comment, Review, Title, Genre, Category, User)
+
+
+def snapshot():
+    '''
+    Число строк каждой модели и денормализованные счетчики.
+    '''
+    return {
+        'rows': {model.__name__: model.objects.count() for model in MODELS},
+        'genres': Title.genre.through.objects.count(),
+        'titles': {
+            title['pk']: dict(title, genre_ids=sorted(title['genre_ids']))
+            for title in Title.objects.values(
+                'pk', 'score_sum', 'score_count', 'reviews_count',
+                'genre_ids'
+            )
+        },
+        'reviews': dict(Review.objects.values_list('pk', 'comments_count')),
+    }
+
+
+class TestLoadTestData:
+
+    def test_bulk_matches_row_by_row(self, database):
+        call_command('loadtestdata', stdout=StringIO(), stderr=StringIO())
+        expected = snapshot()
+        assert all(expected['rows'].values()) and expected['genres'], (
+            'Проверьте, что loadtestdata загружает все файлы'
+        )
+        assert any(expected['reviews'].values()) and all(
+            title['reviews_count'] and title['genre_ids']
+            for title in expected['titles'].values()
+            if title['score_count']
+        ), 'Проверьте счетчики после загрузки по одной строке'
+        for model in MODELS:
+            model.objects.all().delete()
+        call_command('loadtestdata', bulk=True, stdout=StringIO(),
+                     stderr=StringIO())
+        assert snapshot() == expected, (
+            'Проверьте, что loadtestdata --bulk загружает те же строки '
+            'и счетчики, что и загрузка по одной строке'
+        )
@@ -0,0 +1,83 @@
+import os
+import time
+
+from api import metrics
+from api.metrics import (Registry, RequestStats, archive_process,
+                         clear_metrics_dir, render)
+
+
+def record(registry, duration, queries):
+    stats = RequestStats()
+    stats.queries = queries
+    registry.record('titles-list', 'GET', 200, duration, stats)
+
+
+class TestMetricsRegistry:
+
+    def test_histogram_buckets_are_cumulative(self, settings):
+        settings.METRICS_DIR = ''
+        registry = Registry()
+        record(registry, 0.02, 3)
+        samples = registry.collect()
+        labels = 'view="titles-list",method="GET"'
+        bucket = 'yamdb_http_request_duration_seconds_bucket{%s,le="%s"}'
+        assert bucket % (labels, '0.01') not in samples, (
+            'Проверьте, что запрос не попадает в меньшие корзины'
+        )
+        assert samples[bucket % (labels, '0.025')] == 1, (
+            'Проверьте, что запрос попадает в свою корзину'
+        )
+        assert samples[bucket % (labels, '+Inf')] == 1, (
+            'Проверьте, что каждая гистограмма имеет корзину +Inf'
+        )
+
+    def test_processes_are_aggregated(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        first, second = Registry(), Registry()
+        record(first, 0.1, 1)
+        record(second, 0.1, 2)
+        text = render(second.collect())
+        assert (
+            'yamdb_http_requests_total{view="titles-list",method="GET",'
+            'status="200"} 2'
+        ) in text, 'Проверьте, что метрики процессов суммируются'
+        assert (
+            'yamdb_db_queries_sum{view="titles-list",method="GET"} 3'
+        ) in text, 'Проверьте, что учитывается число SQL-запросов'
+
+    def test_dead_process_is_archived(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        dead, alive = Registry(), Registry()
+        record(dead, 0.1, 1)
+        record(alive, 0.1, 1)
+        os.replace(dead.path, str(tmp_path / '999999-dead.json'))
+        archive_process(999999)
+        assert not list(tmp_path.glob('999999-*')), (
+            'Проверьте, что файл завершившегося процесса удаляется'
+        )
+        assert alive.collect()[
+            'yamdb_http_requests_total{view="titles-list",method="GET",'
+            'status="200"}'
+        ] == 2, 'Проверьте, что метрики завершившегося процесса сохраняются'
+        clear_metrics_dir()
+        assert not list(tmp_path.iterdir()), (
+            'Проверьте, что при старте удаляются метрики прежних запусков'
+        )
+
+    def test_idle_process_writes_last_samples(
+        self, settings, tmp_path, monkeypatch
+    ):
+        settings.METRICS_DIR = str(tmp_path)
+        monkeypatch.setattr(metrics, 'FLUSH_INTERVAL', 0.2)
+        first, second = Registry(), Registry()
+        for _ in range(3):
+            record(first, 0.1, 1)
+            record(second, 0.1, 1)
+        time.sleep(0.5)
+        assert first.collect()[
+            'yamdb_http_requests_total{view="titles-list",method="GET",'
+            'status="200"}'
+        ] == 6, (
+            'Проверьте, что процесс без новых запросов записывает '
+            'последние метрики'
+        )
@@ -0,0 +1,71 @@
+from base64 import b64encode
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Review, Title, User
+
+
+class TestCursorPagination:
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        title = Title.objects.create(name='Книга', year=2000, description='')
+        for number in range(5):
+            Review.objects.create(
+                author=User.objects.create(
+                    username='u{}'.format(number),
+                    email='u{}@yamdb.fake'.format(number)
+                ),
+                title=title, text='Отзыв {}'.format(number)
+            )
+        # Одинаковые pub_date: порядок задает только id.
+        Review.objects.update(pub_date=timezone.now())
+        self.url = '/api/v1/titles/{}/reviews/'.format(title.pk)
+
+    def walk(self, url, link):
+        '''
+        id всех отзывов в порядке сортировки, начиная со страницы url.
+        '''
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            page_ids = [review['id'] for review in page['results']]
+            ids = ids + page_ids if link == 'next' else page_ids + ids
+            url = page[link]
+        return ids
+
+    def test_walk_over_equal_pub_dates(self, database):
+        self.setup_data()
+        expected = list(
+            Review.objects.order_by('pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        ids = self.walk('{}?cursor=&limit=2'.format(self.url), 'next')
+        assert ids == expected, (
+            'Проверьте, что курсор проходит все отзывы с одинаковой '
+            'датой без пропусков и повторов'
+        )
+        last_page = self.client.get(
+            '{}?cursor=&limit=2'.format(self.url)
+        ).json()
+        while last_page['next']:
+            last_page = self.client.get(last_page['next']).json()
+        assert self.walk(last_page['previous'], 'previous') == expected[
+            :-1
+        ], 'Проверьте переход назад по ссылкам previous'
+
+    def test_tampered_cursor(self, database):
+        self.setup_data()
+        for position in ('2021', '["yesterday", "1"]', '["2021-01-01", "x"]'):
+            cursor = b64encode('p={}'.format(position).encode()).decode()
+            response = self.client.get(self.url, {'cursor': cursor})
+            assert response.status_code == 404, (
+                'Проверьте ответ 404 на подделанный курсор {}'.format(position)
+            )
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        assert response.status_code == 404, (
+            'Проверьте ответ 404 на курсор не в base64'
+        )
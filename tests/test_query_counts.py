@@ -0,0 +1,108 @@
+from api.serializers import TitleReadSerializer
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class TestTitleQueryCounts:
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        categories = [
+            Category.objects.create(name='Категория {}'.format(i),
+                                    slug='c{}'.format(i))
+            for i in range(3)
+        ]
+        genres = [
+            Genre.objects.create(name='Жанр {}'.format(i),
+                                 slug='g{}'.format(i))
+            for i in range(4)
+        ]
+        self.titles = []
+        for number in range(6):
+            title = Title.objects.create(
+                name='Книга {}'.format(number), year=2000, description='',
+                category=categories[number % 3]
+            )
+            title.genre.set(genres[:number % 4 + 1])
+            self.titles.append(title)
+
+    def test_list(self, database, django_assert_num_queries):
+        self.setup_data()
+        # count, произведения с категориями, жанры страницы
+        with django_assert_num_queries(3):
+            response = self.client.get('/api/v1/titles/')
+        assert response.status_code == 200 and len(
+            response.json()['results']
+        ) == 6
+
+    def test_retrieve(self, database, django_assert_num_queries):
+        self.setup_data()
+        with django_assert_num_queries(2):
+            response = self.client.get(
+                '/api/v1/titles/{}/'.format(self.titles[-1].pk)
+            )
+        assert len(response.json()['genre']) == 2
+
+    def test_serializer_over_model_instances(
+        self, database, django_assert_num_queries
+    ):
+        self.setup_data()
+        with django_assert_num_queries(2):
+            data = TitleReadSerializer(
+                Title.objects.with_relations(), many=True
+            ).data
+        assert len(data) == 6
+
+
+class TestNestedQueryCounts:
+    '''
+    Отзывы и комментарии разных авторов: загрузка родителя
+    или автора на каждый объект дала бы десятки запросов.
+    '''
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        title = Title.objects.create(name='Книга', year=2000, description='')
+        users = [
+            User.objects.create(username='u{}'.format(i),
+                                email='u{}@yamdb.fake'.format(i))
+            for i in range(8)
+        ]
+        reviews = [
+            Review.objects.create(author=user, title=title, text='Отзыв',
+                                  score=5)
+            for user in users
+        ]
+        for user in users:
+            Comment.objects.create(author=user, review=reviews[0],
+                                   text='Комментарий')
+        self.reviews_url = '/api/v1/titles/{}/reviews/'.format(title.pk)
+        self.comments_url = '{}{}/comments/'.format(
+            self.reviews_url, reviews[0].pk
+        )
+        self.comment = Comment.objects.first()
+
+    def test_lists(self, database, django_assert_num_queries):
+        self.setup_data()
+        for url, count in ((self.reviews_url, 2), (self.comments_url, 2),
+                           (self.reviews_url + '?cursor=', 1),
+                           (self.comments_url + '?cursor=', 1)):
+            cache.clear()
+            with django_assert_num_queries(count):
+                response = self.client.get(url)
+            assert len(response.json()['results']) == 8
+
+    def test_details(self, database, django_assert_num_queries):
+        self.setup_data()
+        review = self.comment.review
+        for url, author in (
+            ('{}{}/'.format(self.reviews_url, review.pk), review.author),
+            ('{}{}/'.format(self.comments_url, self.comment.pk),
+             self.comment.author),
+        ):
+            with django_assert_num_queries(1):
+                response = self.client.get(url)
+            assert response.json()['author'] == author.username
@@ -0,0 +1,71 @@
+import json
+
+import msgpack
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class TestRenderers:
+
+    def setup_data(self):
+        category = Category.objects.create(name='Книга', slug='book')
+        genre = Genre.objects.create(name='Роман', slug='roman')
+        self.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role='admin'
+        )
+        title = Title.objects.create(
+            name='Война и мир\u2028', year=1869, description='"Эпопея"',
+            category=category
+        )
+        title.genre.set([genre])
+        review = Review.objects.create(
+            author=self.admin, title=title, score=10, text='Отзыв'
+        )
+        comment = Comment.objects.create(
+            author=self.admin, review=review, text='Комментарий'
+        )
+        reviews = '/api/v1/titles/{}/reviews/'.format(title.pk)
+        comments = '{}{}/comments/'.format(reviews, review.pk)
+        return (
+            '/api/v1/titles/', '/api/v1/titles/{}/'.format(title.pk),
+            '/api/v1/titles/0/', '/api/v1/titles/?fields=unknown',
+            '/api/v1/categories/', '/api/v1/genres/',
+            reviews, '{}?cursor='.format(reviews),
+            '{}{}/'.format(reviews, review.pk),
+            comments, '{}{}/'.format(comments, comment.pk),
+            '/api/v1/users/', '/api/v1/users/admin/', '/api/v1/users/me/',
+        )
+
+    def test_formats_are_equivalent_on_every_endpoint(self, database):
+        urls = self.setup_data()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for url in urls:
+            cache.clear()
+            response = client.get(url, HTTP_ACCEPT='application/json')
+            assert response.content == JSONRenderer().render(
+                response.data
+            ), 'Проверьте, что orjson выводит те же байты, что json: ' + url
+            cache.clear()
+            packed = client.get(url, HTTP_ACCEPT='application/msgpack')
+            assert packed['Content-Type'] == 'application/msgpack', (
+                'Проверьте, что MessagePack выбирается по заголовку Accept'
+            )
+            assert msgpack.unpackb(packed.content) == json.loads(
+                response.content
+            ), 'Проверьте, что MessagePack содержит те же данные: ' + url
+
+    def test_msgpack_request_body(self, database):
+        self.setup_data()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(
+            '/api/v1/categories/',
+            msgpack.packb({'name': 'Фильм', 'slug': 'movie'}),
+            content_type='application/msgpack'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что тело запроса принимается в MessagePack'
+        )
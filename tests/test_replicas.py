@@ -0,0 +1,65 @@
+from api.checks import replicas_need_shared_cache
+from api.replicas import PRIMARY_COOKIE, ReplicaMiddleware, ReplicaRouter
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from reviews.models import Title
+
+
+class TestReplicaRouting:
+
+    def request(self, method, cookies=None):
+        '''
+        База, с которой представление DRF читало бы произведения.
+        '''
+        databases = []
+
+        def view(request):
+            databases.append(ReplicaRouter().db_for_read(Title))
+            return HttpResponse(status=201)
+        view.cls = object
+
+        request = getattr(RequestFactory(), method)('/api/v1/titles/')
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaMiddleware(
+            lambda request: middleware.process_view(request, view, (), {})
+            or view(request)
+        )
+        response = middleware(request)
+        return databases[0] or 'default', response
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_safe_requests_read_from_replica(self):
+        database, _ = self.request('get')
+        assert database == 'replica_1', (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+        database, response = self.request('post')
+        assert database == 'default', (
+            'Проверьте, что изменяющие запросы работают с default'
+        )
+        cookie = response.cookies[PRIMARY_COOKIE]
+        database, _ = self.request('get', {PRIMARY_COOKIE: cookie.value})
+        assert database == 'default', (
+            'Проверьте, что после записи клиент читает с default'
+        )
+
+    def test_no_replicas(self):
+        database, _ = self.request('get')
+        assert database == 'default', (
+            'Проверьте, что без реплик все запросы идут в default'
+        )
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_replicas_are_not_migrated(self):
+        router = ReplicaRouter()
+        assert router.allow_migrate('replica_1', 'reviews') is False, (
+            'Проверьте, что migrate не применяется к репликам'
+        )
+        assert router.allow_migrate('default', 'reviews') is None
+
+    def test_replicas_need_shared_cache(self):
+        assert replicas_need_shared_cache(None) == []
+        with override_settings(DATABASE_REPLICAS=['replica_1']):
+            assert [error.id for error in replicas_need_shared_cache(None)] == [
+                'api.E001'
+            ], 'Проверьте, что реплики с LocMem-кэшем дают ошибку проверки'
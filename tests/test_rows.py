@@ -0,0 +1,49 @@
+from api.rows import RowPlan
+from api.serializers import (CommentSerializer, ListRetrieveReviewSerializer,
+                             TitleReadSerializer)
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+def render_both(serializer_class, queryset):
+    plan = RowPlan(serializer_class())
+    render = JSONRenderer().render
+    return (
+        render(serializer_class(list(queryset), many=True).data),
+        render(plan.represent(list(plan.values(queryset)))),
+    )
+
+
+class TestRowPlan:
+
+    def setup_data(self):
+        category = Category.objects.create(name='Книга', slug='book')
+        genres = [
+            Genre.objects.create(name='Жанр {}'.format(i), slug='g{}'.format(i))
+            for i in range(3)
+        ]
+        user = User.objects.create(username='reader', email='r@yamdb.fake')
+        titles = [
+            Title.objects.create(name='Без категории', year=2000,
+                                 description=''),
+            Title.objects.create(name='Книга', year=1999, description='Текст',
+                                 category=category),
+        ]
+        titles[1].genre.set(genres[::2])
+        review = Review.objects.create(author=user, title=titles[1],
+                                       score=7, text='Отзыв')
+        Review.objects.create(author=user, title=titles[0], text='Без оценки')
+        Comment.objects.create(author=user, review=review, text='Комментарий')
+
+    def test_output_matches_serializers(self, database):
+        self.setup_data()
+        for serializer_class, queryset in (
+            (TitleReadSerializer, Title.objects.with_relations()),
+            (ListRetrieveReviewSerializer, Review.objects.with_author()),
+            (CommentSerializer, Comment.objects.with_author()),
+        ):
+            drf, rows = render_both(serializer_class, queryset.order_by('pk'))
+            assert drf == rows, (
+                'Проверьте, что ответ из строк values_list() совпадает '
+                'с ответом {}'.format(serializer_class.__name__)
+            )
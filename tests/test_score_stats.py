@@ -0,0 +1,34 @@
+from reviews.models import Title, score_field
+
+
+def title_with_scores(*scores):
+    title = Title(score_sum=sum(scores), score_count=len(scores))
+    for score in scores:
+        field = score_field(score)
+        setattr(title, field, getattr(title, field) + 1)
+    return title
+
+
+class TestScoreStats:
+
+    def test_median_and_mean(self):
+        for scores, median, mean in (
+            ((7,), 7, 7),
+            ((1, 10, 3), 3, 4.67),
+            ((8, 1, 4, 1), 2.5, 3.5),
+            ((5, 5, 6, 6), 5.5, 5.5),
+        ):
+            title = title_with_scores(*scores)
+            assert title.score_median == median, (
+                'Проверьте медиану оценок {}'.format(scores)
+            )
+            assert title.score_mean == mean, (
+                'Проверьте среднюю оценку {}'.format(scores)
+            )
+
+    def test_no_scores(self):
+        title = Title()
+        assert title.score_median is None and title.score_mean is None, (
+            'Проверьте, что без оценок медиана и среднее не заданы'
+        )
+        assert sum(title.score_distribution.values()) == 0
@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+from reviews.models import Title
+
+
+class TestTitleSearch:
+
+    def setup_data(self):
+        cache.clear()
+        self.client = APIClient()
+        # Ключевые слова - со строчной буквы: в локали C Postgres
+        # не приводит кириллицу к нижнему регистру (см. README).
+        self.war = Title.objects.create(
+            name='Эпопея', year=1869, description='Длинный роман о войне'
+        )
+        self.peace = Title.objects.create(
+            name='Война и мир', year=2000, description='Повесть о деревне'
+        )
+
+    def search(self, text):
+        response = self.client.get('/api/v1/titles/', {'search': text})
+        assert response.status_code == 200
+        return [title['id'] for title in response.json()['results']]
+
+    def require_postgres(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Полнотекстовый поиск работает только в Postgres')
+
+    def test_stemmed_words_match(self, database):
+        self.require_postgres()
+        self.setup_data()
+        for text in ('войне', 'войной', 'романы'):
+            assert self.war.pk in self.search(text), (
+                'Проверьте, что поиск находит другие формы слова: '
+                '{}'.format(text)
+            )
+
+    def test_name_ranks_above_description(self, database):
+        self.require_postgres()
+        self.setup_data()
+        in_description = Title.objects.create(
+            name='Хроника', year=2001, description='О мире после войны'
+        )
+        assert self.search('мир') == [self.peace.pk, in_description.pk], (
+            'Проверьте, что совпадение в названии выше, чем в описании'
+        )
+
+    def test_trigger_refreshes_vector(self, database):
+        self.require_postgres()
+        self.setup_data()
+        self.war.description = 'Повесть о море'
+        self.war.save()
+        assert self.search('роман') == [], (
+            'Проверьте, что изменение описания обновляет поисковый вектор'
+        )
+        assert self.search('моря') == [self.war.pk]
+        Title.objects.filter(pk=self.peace.pk).update(name='Новый роман')
+        cache.clear()
+        assert self.search('романы') == [self.peace.pk], (
+            'Проверьте, что вектор обновляется и при update() без save()'
+        )
+
+    def test_empty_query(self, database):
+        self.setup_data()
+        for text in ('', '   '):
+            assert sorted(self.search(text)) == sorted(
+                [self.war.pk, self.peace.pk]
+            ), 'Проверьте, что пустой поиск не фильтрует произведения'
+        self.require_postgres()
+        assert self.search('и') == [], (
+            'Проверьте поиск только по стоп-словам'
+        )
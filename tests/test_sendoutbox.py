@@ -0,0 +1,102 @@
+import smtplib
+from datetime import timedelta
+from io import StringIO
+
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import EmailStatus, OutgoingEmail
+
+
+class FlakyBackend(BaseEmailBackend):
+    '''
+    Почтовый сервер, который отклоняет письма на failing
+    и обрывает соединение на письме breaking.
+    '''
+    sent = []
+    failing = set()
+    breaking = None
+    down = False
+
+    def open(self):
+        if FlakyBackend.down:
+            raise OSError('Connection refused')
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            recipient = message.to[0]
+            if recipient == FlakyBackend.breaking:
+                FlakyBackend.down = True
+                raise smtplib.SMTPServerDisconnected('Connection lost')
+            if recipient in FlakyBackend.failing:
+                raise smtplib.SMTPRecipientsRefused({recipient: (550, b'')})
+            FlakyBackend.sent.append(recipient)
+        return len(messages)
+
+
+class TestSendOutbox:
+
+    def setup_method(self):
+        FlakyBackend.sent = []
+        FlakyBackend.failing = set()
+        FlakyBackend.breaking = None
+        FlakyBackend.down = False
+
+    def send(self, settings, *recipients, **options):
+        settings.EMAIL_BACKEND = 'tests.test_sendoutbox.FlakyBackend'
+        emails = [
+            OutgoingEmail.objects.create(
+                subject='Код', body='123', from_email='yamdb@yamdb.fake',
+                recipient=recipient
+            )
+            for recipient in recipients
+        ]
+        call_command('sendoutbox', stdout=StringIO(), **options)
+        for email in emails:
+            email.refresh_from_db()
+        return emails
+
+    def test_sent(self, database, settings):
+        emails = self.send(settings, 'a@yamdb.fake', 'b@yamdb.fake')
+        assert FlakyBackend.sent == ['a@yamdb.fake', 'b@yamdb.fake'], (
+            'Проверьте, что письма из очереди отправляются по порядку'
+        )
+        assert all(
+            email.status == EmailStatus.SENT and not email.body
+            for email in emails
+        ), 'Проверьте, что у отправленных писем стирается текст'
+
+    def test_retry_with_backoff(self, database, settings):
+        FlakyBackend.failing = {'a@yamdb.fake'}
+        started = timezone.now()
+        failed, sent = self.send(
+            settings, 'a@yamdb.fake', 'b@yamdb.fake', backoff=60
+        )
+        assert sent.status == EmailStatus.SENT, (
+            'Проверьте, что ошибка одного письма не мешает остальным'
+        )
+        assert failed.status == EmailStatus.PENDING and failed.attempts == 1
+        assert failed.next_attempt_at >= started + timedelta(seconds=60), (
+            'Проверьте задержку перед повторной отправкой'
+        )
+
+    def test_dead_letter(self, database, settings):
+        FlakyBackend.failing = {'a@yamdb.fake'}
+        email, = self.send(settings, 'a@yamdb.fake', max_attempts=1)
+        assert email.status == EmailStatus.DEAD and email.last_error, (
+            'Проверьте, что после max_attempts письмо не доставлено'
+        )
+
+    def test_broken_connection(self, database, settings):
+        FlakyBackend.breaking = 'b@yamdb.fake'
+        sent, broken, rest = self.send(
+            settings, 'a@yamdb.fake', 'b@yamdb.fake', 'c@yamdb.fake'
+        )
+        assert sent.status == EmailStatus.SENT, (
+            'Проверьте, что отправленные письма не откатываются, '
+            'если переподключиться не удалось'
+        )
+        assert [broken.attempts, rest.attempts] == [1, 1] and all(
+            email.status == EmailStatus.PENDING for email in (broken, rest)
+        ), 'Проверьте, что остаток пачки откладывается на повтор'
@@ -0,0 +1,77 @@
+import pytest
+from api.authentication import (StatelessJWTAuthentication, access_token_for,
+                                cache_user_state, user_state)
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from reviews.models import User, UserRoles
+
+
+class TestStatelessJWTAuthentication:
+
+    def setup_method(self):
+        cache.clear()
+        self.user = User(id=10 ** 9, username='stateless',
+                         role=UserRoles.ADMIN)
+        self.token = StatelessJWTAuthentication().get_validated_token(
+            str(access_token_for(self.user))
+        )
+
+    def test_user_is_built_from_claims(self):
+        cache_user_state(self.user.pk, user_state(self.user))
+        user = StatelessJWTAuthentication().get_user(self.token)
+        assert user == self.user and user.is_admin, (
+            'Проверьте, что пользователь и его роль берутся из токена'
+        )
+
+    def test_role_change_revokes_token(self):
+        self.user.role = UserRoles.USER
+        cache_user_state(self.user.pk, user_state(self.user))
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().get_user(self.token)
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        cache_user_state(self.user.pk, user_state(self.user))
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().get_user(self.token)
+
+    def test_token_user_is_not_saved(self):
+        cache_user_state(self.user.pk, user_state(self.user))
+        user = StatelessJWTAuthentication().get_user(self.token)
+        for method in (user.save, user.delete):
+            with pytest.raises(NotImplementedError):
+                method()
+
+
+class TestStatelessJWTRequests:
+
+    def setup_data(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='reader', email='reader@yamdb.fake', bio='О себе'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer {}'.format(
+            access_token_for(self.user)
+        ))
+
+    def test_no_auth_queries(self, database, django_assert_num_queries):
+        self.setup_data()
+        # Единственный запрос - профиль; состояние пользователя
+        # сигнал уже записал в кэш.
+        with django_assert_num_queries(1):
+            response = self.client.get('/api/v1/users/me/')
+        assert response.status_code == 200 and (
+            response.json()['email'] == self.user.email
+        ), 'Проверьте, что профиль загружается из БД'
+
+    def test_profile_update_keeps_other_fields(self, database):
+        self.setup_data()
+        response = self.client.patch('/api/v1/users/me/',
+                                     {'first_name': 'Иван'})
+        assert response.status_code == 200
+        self.user.refresh_from_db()
+        assert (self.user.first_name, self.user.email, self.user.bio) == (
+            'Иван', 'reader@yamdb.fake', 'О себе'
+        ), 'Проверьте, что изменение профиля не затирает другие поля'
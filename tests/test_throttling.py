@@ -0,0 +1,39 @@
+from api.throttling import AnonThrottle
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class ClockThrottle(AnonThrottle):
+    rate = '3/min'
+    now = 0
+
+    def timer(self):
+        return self.now
+
+
+def allowed_at(now):
+    ClockThrottle.now = now
+    request = Request(APIRequestFactory().get('/api/v1/titles/'))
+    throttle = ClockThrottle()
+    return throttle.allow_request(request, None), throttle
+
+
+class TestSlidingWindowThrottle:
+
+    def setup_method(self):
+        caches[settings.THROTTLE_CACHE].clear()
+
+    def test_sliding_window(self):
+        assert [allowed_at(second)[0] for second in (0, 1, 2, 3)] == [
+            True, True, True, False
+        ], 'Проверьте лимит внутри окна'
+        allowed, throttle = allowed_at(61)
+        assert not allowed and 0 < throttle.wait() <= 60, (
+            'Проверьте, что запросы предыдущего окна учитываются '
+            'в начале следующего'
+        )
+        assert allowed_at(100)[0], (
+            'Проверьте, что вклад предыдущего окна уменьшается со временем'
+        )
@@ -0,0 +1,125 @@
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import SCORE_FIELDS, Review, Title, User
+
+COUNTER_FIELDS = ('reviews_count', 'score_sum', 'score_count', 'score_avg',
+                  'trend_score', *SCORE_FIELDS)
+
+
+def stored_counters():
+    return {
+        title['pk']: title
+        for title in Title.objects.values('pk', *COUNTER_FIELDS)
+    }
+
+
+class TestTitleCounters:
+
+    def setup_data(self):
+        self.users = [
+            User.objects.create(username='u{}'.format(i),
+                                email='u{}@yamdb.fake'.format(i))
+            for i in range(3)
+        ]
+        self.titles = [
+            Title.objects.create(name=str(i), year=2000, description='')
+            for i in range(2)
+        ]
+        self.reviews = [
+            Review.objects.create(author=user, title=self.titles[0],
+                                  text='Отзыв', score=score)
+            for user, score in zip(self.users, (2, 6, None))
+        ]
+
+    def counters(self, title):
+        title.refresh_from_db()
+        return (title.reviews_count, title.score_sum, title.score_count,
+                title.score_avg)
+
+    def counts_of_first(self):
+        return self.counters(self.titles[0])
+
+    def assert_rebuild_agrees(self):
+        '''
+        Пересчет с нуля дает те же значения, что и сигналы.
+        '''
+        expected = stored_counters()
+        call_command('rebuildratings', stdout=StringIO())
+        call_command('reconcilecounters', stdout=StringIO())
+        actual = stored_counters()
+        for pk, title in expected.items():
+            assert actual[pk]['trend_score'] == pytest.approx(
+                title.pop('trend_score')
+            ), 'Проверьте популярность после пересчета'
+            actual[pk].pop('trend_score')
+        assert actual == expected, (
+            'Проверьте, что rebuildratings не расходится с сигналами'
+        )
+
+    def test_create_and_deferred_update(self, database):
+        self.setup_data()
+        assert self.counts_of_first() == (3, 8, 2, 4.0), (
+            'Проверьте счетчики при создании отзывов'
+        )
+        review = Review.objects.only('id', 'text').get(
+            pk=self.reviews[0].pk
+        )
+        review.score = 10
+        review.save()
+        assert self.counts_of_first() == (3, 16, 2, 8.0), (
+            'Проверьте счетчики при изменении отзыва с отложенными полями'
+        )
+        self.assert_rebuild_agrees()
+
+    def test_move_review_to_another_title(self, database):
+        self.setup_data()
+        review = self.reviews[1]
+        review.title = self.titles[1]
+        review.save()
+        assert self.counts_of_first() == (2, 2, 1, 2.0), (
+            'Проверьте счетчики произведения, с которого перенесен отзыв'
+        )
+        assert self.counters(self.titles[1]) == (1, 6, 1, 6.0), (
+            'Проверьте счетчики произведения, на которое перенесен отзыв'
+        )
+        self.assert_rebuild_agrees()
+
+    def test_cascade_delete(self, database):
+        self.setup_data()
+        Review.objects.create(author=self.users[0], title=self.titles[1],
+                              text='Отзыв', score=4)
+        self.users[1].delete()
+        assert self.counts_of_first() == (2, 2, 1, 2.0), (
+            'Проверьте счетчики при каскадном удалении автора'
+        )
+        self.titles[0].delete()
+        assert self.counters(self.titles[1]) == (1, 4, 1, 4.0), (
+            'Проверьте, что удаление произведения не меняет чужие счетчики'
+        )
+        self.assert_rebuild_agrees()
+
+    def test_trend_far_from_epoch(self, database):
+        '''
+        Веса отзывов через десятилетия от TREND_EPOCH вышли бы
+        за пределы float; популярность хранится в лог-пространстве.
+        '''
+        self.setup_data()
+        future = datetime(2100, 1, 1, tzinfo=timezone.utc)
+        Review.objects.filter(pk=self.reviews[0].pk).update(pub_date=future)
+        review = Review.objects.get(pk=self.reviews[0].pk)
+        review.score = 9
+        review.save()
+        assert list(Title.objects.trending(now=future)) == [
+            self.titles[0]
+        ], 'Проверьте популярность произведения с далеким отзывом'
+        review.delete()
+        assert self.counts_of_first() == (2, 6, 1, 6.0)
+        assert self.titles[0].trend_score is not None, (
+            'Проверьте, что после удаления самого тяжелого отзыва '
+            'популярность пересчитывается по остальным'
+        )
+        self.assert_rebuild_agrees()
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Review, Title, User
+
+
+class TestTitleOrdering:
+
+    def setup_data(self):
+        users = [
+            User.objects.create(username='u{}'.format(i),
+                                email='u{}@yamdb.fake'.format(i))
+            for i in range(2)
+        ]
+        old, best, unrated = (
+            Title.objects.create(name=name, year=2000, description='')
+            for name in ('Старое', 'Лучшее', 'Без оценок')
+        )
+        for user, score in zip(users, (9, 8)):
+            Review.objects.create(author=user, title=old, score=score,
+                                  text='Отзыв')
+        Review.objects.create(author=users[0], title=best, score=10,
+                              text='Отзыв')
+        for user in users:
+            Review.objects.create(author=user, title=unrated, text='Отзыв')
+        Review.objects.filter(title=old).update(
+            pub_date=timezone.now() - timedelta(days=60)
+        )
+
+    def names(self, url):
+        response = APIClient().get(url)
+        assert response.status_code == 200, url
+        return [title['name'] for title in response.data['results']]
+
+    def test_rating_ordering(self, database):
+        self.setup_data()
+        assert self.names('/api/v1/titles/?ordering=-rating') == [
+            'Лучшее', 'Старое', 'Без оценок'
+        ], 'Проверьте сортировку по убыванию рейтинга'
+        assert self.names('/api/v1/titles/?ordering=rating') == [
+            'Старое', 'Лучшее', 'Без оценок'
+        ], 'Проверьте, что произведения без оценок идут в конце'
+        assert self.names('/api/v1/titles/top/') == ['Лучшее', 'Старое'], (
+            'Проверьте, что в top только произведения с оценками'
+        )
+
+    def test_trending(self, database):
+        self.setup_data()
+        assert self.names('/api/v1/titles/trending/') == [
+            'Без оценок', 'Лучшее'
+        ], (
+            'Проверьте, что trending учитывает все недавние отзывы '
+            'и не включает произведения со старыми отзывами'
+        )
@@ -0,0 +1,62 @@
+import pytest
+from django.db import DatabaseError, connection
+from reviews.models import Title, User
+
+
+def trigram_indexes_available():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            )
+            return cursor.fetchone() is not None
+    except DatabaseError:
+        return False
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def trigram_db(request, django_db_blocker):
+    with django_db_blocker.unblock():
+        available = (connection.vendor == 'postgresql'
+                     and trigram_indexes_available())
+    if not available:
+        pytest.skip('Нужен Postgres с расширением pg_trgm')
+    request.getfixturevalue('db')
+
+
+ROWS = 20000
+
+
+class TestTrigramIndexes:
+
+    def test_title_name_filter_uses_index(self, trigram_db):
+        Title.objects.bulk_create(
+            Title(name='Произведение {}'.format(i), year=2000, description='')
+            for i in range(ROWS)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE reviews_title')
+
+        plan = Title.objects.filter(name__icontains='ние 1234').explain()
+
+        assert 'reviews_title_name_trgm_idx' in plan, (
+            'Проверьте, что фильтр name использует триграммный индекс:\n'
+            + plan
+        )
+
+    def test_user_search_uses_indexes(self, trigram_db):
+        User.objects.bulk_create(
+            User(username='user{}'.format(i), email='mail{}@yamdb.fake'.format(i))
+            for i in range(ROWS)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE reviews_user')
+
+        plan = User.objects.filter(username__icontains='er1234').explain()
+
+        assert 'reviews_user_username_trgm_idx' in plan, (
+            'Проверьте, что поиск по username использует триграммный индекс:\n'
+            + plan
+        )